@@ -0,0 +1,98 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from bench.corpus import CorpusParams
+from bench.stages import Corpus, STAGES
+
+
+def time_stage(run, corpus, repeat):
+    # A stage may return a dict of metrics besides its time, like the byte
+    # savings of minify; the last run's is kept.
+    runs = []
+    metrics = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        metrics = run(corpus)
+        runs.append(time.perf_counter() - start)
+    result = {"best": min(runs), "median": statistics.median(runs), "runs": runs}
+    if metrics:
+        result["metrics"] = metrics
+    return result
+
+
+def run_benchmarks(params, stages, repeat):
+    with tempfile.TemporaryDirectory() as root:
+        corpus = Corpus(root, params)
+        results = {}
+        for name in stages:
+            print(f"BENCH - {name}", file=sys.stderr)
+            results[name] = time_stage(STAGES[name], corpus, repeat)
+        return {
+            "python": platform.python_version(),
+            "params": params.to_dict(),
+            "corpus": {"pages": len(corpus.pages), "bytes": corpus.bytes, "blocks": len(corpus.blocks)},
+            "repeat": repeat,
+            "stages": results,
+        }
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{'stage':<24}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name, result in after["stages"].items():
+        if name not in before["stages"]:
+            continue
+        old = before["stages"][name]["best"]
+        new = result["best"]
+        print(f"{name:<24}{old * 1000:>12.2f}{new * 1000:>12.2f}{old / new:>9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python3 -m bench", description="Time each build stage on a synthetic site")
+    defaults = CorpusParams()
+    parser.add_argument("--pages", type=int, default=defaults.pages)
+    parser.add_argument("--sections", type=int, default=defaults.sections)
+    parser.add_argument("--paragraphs", type=int, default=defaults.paragraphs,
+                        help="blocks per page after the title")
+    parser.add_argument("--paragraph-words", type=int, default=defaults.paragraph_words)
+    parser.add_argument("--link-density", type=float, default=defaults.link_density)
+    parser.add_argument("--image-density", type=float, default=defaults.image_density)
+    parser.add_argument("--list-items", type=int, default=defaults.list_items)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help="comma separated subset of: " + ", ".join(STAGES))
+    parser.add_argument("--out", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="print a comparison of two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    stages = args.stages.split(",")
+    for name in stages:
+        if name not in STAGES:
+            parser.error(f"unknown stage: {name}")
+    params = CorpusParams(args.pages, args.sections, args.paragraphs, args.paragraph_words,
+                          args.link_density, args.image_density, args.list_items, args.seed)
+    results = run_benchmarks(params, stages, args.repeat)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1)
+    else:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+
+
+main()
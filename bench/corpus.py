@@ -0,0 +1,108 @@
+import os
+import random
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron "
+    "while elves dwarves and men each received rings that bound their fate "
+    "hobbits of the shire lived quietly until a wizard came knocking"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+class CorpusParams():
+
+    def __init__(self, pages=200, sections=20, paragraphs=12, paragraph_words=80,
+                 link_density=0.04, image_density=0.01, list_items=6, seed=0):
+        self.pages = pages
+        self.sections = sections
+        self.paragraphs = paragraphs
+        self.paragraph_words = paragraph_words
+        self.link_density = link_density
+        self.image_density = image_density
+        self.list_items = list_items
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def make_sentence(rng, params, words, images=True):
+    image_density = params.image_density if images else 0
+    parts = []
+    for i in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < params.link_density:
+            parts.append(f"[{word}](/section-{rng.randrange(params.sections)}/page-{rng.randrange(params.pages)})")
+        elif roll < params.link_density + image_density:
+            parts.append(f"![{word}](/images/{word}.png)")
+        elif roll < params.link_density + image_density + 0.03:
+            parts.append(f"**{word}**")
+        elif roll < params.link_density + image_density + 0.05:
+            parts.append(f"_{word}_")
+        elif roll < params.link_density + image_density + 0.06:
+            parts.append(f"`{word}`")
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+
+def make_document(params, index=0):
+    rng = random.Random(f"{params.seed}-{index}")
+    blocks = [f"# Page {index}: {make_sentence(rng, params, 4)}"]
+    for i in range(params.paragraphs):
+        kind = i % 6
+        if kind == 0:
+            blocks.append(f"## {make_sentence(rng, params, 5)}")
+        elif kind == 3:
+            blocks.append("\n".join(f"- {make_sentence(rng, params, 8)}" for _ in range(params.list_items)))
+        elif kind == 4:
+            # Ordered list items may only contain one ".", so no image URLs.
+            blocks.append("\n".join(f"{n + 1}. {make_sentence(rng, params, 8, images=False)}"
+                                    for n in range(params.list_items)))
+        elif kind == 5 and i % 12 == 5:
+            blocks.append("```\n" + "\n".join(make_sentence(rng, params, 6) for _ in range(4)) + "\n```")
+        elif kind == 5:
+            blocks.append("> " + make_sentence(rng, params, params.paragraph_words // 2))
+        else:
+            lines = [make_sentence(rng, params, params.paragraph_words // 2) for _ in range(2)]
+            blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_path(params, index):
+    if index == 0:
+        return "index.md"
+    return os.path.join(f"section-{index % params.sections}", f"page-{index}", "index.md")
+
+
+def generate_site(root, params):
+    # Writes content/, static/ and template.html shaped like the real site.
+    for index in range(params.pages):
+        path = os.path.join(root, "content", page_path(params, index))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(make_document(params, index))
+
+    os.makedirs(os.path.join(root, "static", "images"), exist_ok=True)
+    with open(os.path.join(root, "static", "index.css"), "w") as f:
+        f.write("body { font-family: serif; }\n" * 50)
+    for word in sorted(set(WORDS)):
+        with open(os.path.join(root, "static", "images", f"{word}.png"), "wb") as f:
+            f.write(random.Random(word).randbytes(4096))
+
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write(TEMPLATE)
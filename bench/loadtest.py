@@ -0,0 +1,138 @@
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bench  # puts src/ on sys.path
+from sync import walk_files
+
+MAIN = os.path.join(bench.SRC_DIR, "main.py")
+
+SERVERS = {
+    "staticsite": lambda root, port: [sys.executable, MAIN, "serve", "--port", str(port), "--directory", root],
+    "http.server": lambda root, port: [sys.executable, "-m", "http.server", str(port), "--bind", "127.0.0.1",
+                                       "--directory", root],
+}
+
+
+def site_paths(root):
+    # Every file under root as a request path; index.html is requested as its directory.
+    paths = []
+    for relpath, _ in walk_files(root):
+        if relpath.endswith(".gz"):
+            continue
+        path = "/" + relpath.replace(os.sep, "/")
+        if path.endswith("/index.html"):
+            path = path[:-len("index.html")]
+        paths.append(path)
+    return sorted(paths)
+
+
+async def client(port, paths, offset, deadline, headers):
+    # Sends requests back to back on one connection, reconnecting whenever
+    # the server closes it. Returns (requests, errors, bytes received).
+    requests = errors = received = 0
+    reader = writer = None
+    index = offset
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            path = paths[index % len(paths)]
+            index += 1
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode())
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").lower()
+            length = 0
+            for line in head.split("\r\n"):
+                if line.startswith("content-length:"):
+                    length = int(line.partition(":")[2])
+            received += len(await reader.readexactly(length))
+            if head.startswith("http/1.1 200") or head.startswith("http/1.0 200"):
+                requests += 1
+            else:
+                errors += 1
+            if head.startswith("http/1.0") or "connection: close" in head:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError):
+            errors += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+    return requests, errors, received
+
+
+def run_clients(port, paths, connections, duration, headers, seed):
+    async def run():
+        deadline = time.perf_counter() + duration
+        return await asyncio.gather(*(client(port, paths, seed + i * 7, deadline, headers)
+                                      for i in range(connections)))
+    results = asyncio.run(run())
+    return tuple(sum(values) for values in zip(*results))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def load_test(server, root, paths, processes, connections, duration, headers):
+    port = free_port()
+    process = subprocess.Popen(SERVERS[server](root, port), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(run_clients, port, paths, connections, duration, headers, i)
+                       for i in range(processes)]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+    requests, errors, received = (sum(values) for values in zip(*results))
+    return requests, errors, received, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requests/sec of `main.py serve` compared with http.server")
+    parser.add_argument("--root", default="docs", help="directory to serve (default: %(default)s)")
+    parser.add_argument("--servers", nargs="+", choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per server")
+    parser.add_argument("--processes", type=int, default=2, help="client processes")
+    parser.add_argument("--connections", type=int, default=16, help="connections per client process")
+    parser.add_argument("--gzip", action="store_true", help="send Accept-Encoding: gzip")
+    args = parser.parse_args()
+
+    paths = site_paths(args.root)
+    headers = "Accept-Encoding: gzip\r\n" if args.gzip else ""
+    print(f"root: {args.root}, {len(paths)} paths, {args.processes}x{args.connections} connections, "
+          f"{args.duration:g}s per server")
+    print(f"{'server':<14}{'requests':>10}{'req/s':>10}{'errors':>8}{'MiB/s':>8}")
+    for server in args.servers:
+        requests, errors, received, elapsed = load_test(server, args.root, paths, args.processes,
+                                                        args.connections, args.duration, headers)
+        print(f"{server:<14}{requests:>10}{requests / elapsed:>10.0f}{errors:>8}"
+              f"{received / elapsed / (1024 * 1024):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
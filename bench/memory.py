@@ -0,0 +1,66 @@
+import argparse
+import gc
+import sys
+import tracemalloc
+
+import bench  # puts src/ on sys.path
+from htmlnode import HTMLNode
+from textnode import TextNode, TextType
+from utils import markdown_to_html_node, text_to_textnodes
+
+
+def make_document(sections):
+    parts = []
+    for i in range(sections):
+        parts.append(f"## Section {i}")
+        parts.append(
+            f"Paragraph {i} has **bold text**, some _italic words_, a `code span`, "
+            f"a [link to page {i}](/pages/{i}) and an ![image {i}](/images/{i}.png) "
+            f"followed by plain text that runs on for a while."
+        )
+        parts.append(f"- item **{i}**\n- item [{i}](/items/{i})\n- item _{i}_")
+    return "# Memory benchmark\n\n" + "\n\n".join(parts)
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    live_blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    live_bytes = sum(stat.size for stat in snapshot.statistics("filename"))
+    return result, peak, live_bytes, live_blocks
+
+
+def instance_size(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory and allocations for one large document")
+    parser.add_argument("--sections", type=int, default=5000)
+    args = parser.parse_args()
+
+    markdown = make_document(args.sections)
+    inline_texts = [line for line in markdown.split("\n") if line and not line.startswith("#")]
+    print(f"document: {len(markdown)} bytes, {args.sections} sections")
+    print(f"TextNode instance: {instance_size(TextNode('text', TextType.TEXT))} bytes")
+    print(f"HTMLNode instance: {instance_size(HTMLNode('b', 'text'))} bytes")
+
+    stages = [
+        ("text_to_textnodes", lambda: [text_to_textnodes(text) for text in inline_texts]),
+        ("markdown_to_html_node", lambda: markdown_to_html_node(markdown)),
+    ]
+    print(f"{'stage':<24}{'peak KiB':>12}{'live KiB':>12}{'live blocks':>14}")
+    for name, build in stages:
+        _, peak, live_bytes, live_blocks = measure(build)
+        print(f"{name:<24}{peak / 1024:>12.0f}{live_bytes / 1024:>12.0f}{live_blocks:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import contextlib
+import io
+import os
+
+import bench  # puts src/ on sys.path
+from main import main
+from minify import Minifier
+from textnode import BlockType
+from template import load_template
+from utils import collect_pages, generate_page, extract_title
+from utils import markdown_to_blocks, block_to_block_type, scan_blocks
+from utils import text_to_textnodes, markdown_to_html_node
+
+from bench.corpus import generate_site
+
+
+class Corpus():
+
+    def __init__(self, root, params):
+        generate_site(root, params)
+        self.root = root
+        self.params = params
+        self.template_path = os.path.join(root, "template.html")
+        self.pages = collect_pages(os.path.join(root, "content"), os.path.join(root, "out"))
+        self.documents = []
+        for from_path, _ in self.pages:
+            with open(from_path) as f:
+                self.documents.append(f.read())
+        self.blocks = [block for document in self.documents for block in markdown_to_blocks(document)]
+        self.inline_texts = [" ".join(lines) for document in self.documents
+                             for block_type, lines in scan_blocks(document)
+                             if block_type == BlockType.PARAGRAPH]
+        self.html_nodes = [markdown_to_html_node(document) for document in self.documents]
+        # Each page as the fragments the template serializer writes.
+        template = load_template(self.template_path)
+        self.page_fragments = []
+        for document, html_node in zip(self.documents, self.html_nodes):
+            fragments = []
+            values = {"Title": extract_title(document), "Content": html_node.to_html()}
+            template.write(fragments.append, values)
+            self.page_fragments.append(fragments)
+        self.bytes = sum(len(document) for document in self.documents)
+
+
+def stage_markdown_to_blocks(corpus):
+    for document in corpus.documents:
+        markdown_to_blocks(document)
+
+
+def stage_block_to_block_type(corpus):
+    for block in corpus.blocks:
+        block_to_block_type(block)
+
+
+def stage_text_to_textnodes(corpus):
+    for text in corpus.inline_texts:
+        text_to_textnodes(text)
+
+
+def stage_markdown_to_html_node(corpus):
+    for document in corpus.documents:
+        markdown_to_html_node(document)
+
+
+def stage_to_html(corpus):
+    for html_node in corpus.html_nodes:
+        html_node.to_html()
+
+
+def stage_generate_page(corpus):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for from_path, dest_path in corpus.pages:
+            generate_page(from_path, corpus.template_path, dest_path)
+
+
+def stage_minify(corpus):
+    before = after = 0
+    for fragments in corpus.page_fragments:
+        out = []
+        minifier = Minifier(out.append)
+        for fragment in fragments:
+            minifier.write(fragment)
+        minifier.close()
+        before += sum(len(fragment) for fragment in fragments)
+        after += sum(len(fragment) for fragment in out)
+    return {"bytes_before": before, "bytes_after": after}
+
+
+def stage_generate_page_minify(corpus):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for from_path, dest_path in corpus.pages:
+            generate_page(from_path, corpus.template_path, dest_path, minify=True)
+
+
+def stage_main(corpus):
+    cwd = os.getcwd()
+    os.chdir(corpus.root)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            main(["/"])
+    finally:
+        os.chdir(cwd)
+
+
+STAGES = {
+    "markdown_to_blocks": stage_markdown_to_blocks,
+    "block_to_block_type": stage_block_to_block_type,
+    "text_to_textnodes": stage_text_to_textnodes,
+    "markdown_to_html_node": stage_markdown_to_html_node,
+    "to_html": stage_to_html,
+    "generate_page": stage_generate_page,
+    "minify": stage_minify,
+    "generate_page_minify": stage_generate_page_minify,
+    "main": stage_main,
+}
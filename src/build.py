@@ -0,0 +1,148 @@
+import os
+
+from cache import PARSER_VERSION
+from compress import compress_directory, remove_stale_sidecars
+from manifest import hash_file, new_manifest, load_manifest, save_manifest
+from output import remove_temp_files
+from references import reference_index, template_refs, changed_assets, missing_refs
+from search import SearchIndex, page_url
+from shard import select_shard, write_shard_manifest, SHARD_MANIFEST
+from sync import sync_directory, asset_urls, asset_dest, remove_stale_files
+from tracing import span
+from utils import collect_pages, generate_pages, remove_output
+
+STATE_DIR = ".staticsite"
+
+
+def build_site(basepath='/', incremental=False, content_dir='content',
+               template_path='template.html', static_dir='static',
+               dest_dir='docs', state_dir=STATE_DIR, jobs=1,
+               sync_method="copy", check_hash=False, cache=None,
+               stream_over=None, fsync=False, search=False, gzip=False,
+               fingerprint=False, minify=False, hashes=None, shard=None, store=None):
+    # hashes, a FileHashes, lets a long-lived process skip re-reading
+    # sources that haven't changed since its last build. shard, an (i, N)
+    # pair, renders only the pages of the i-th of N disjoint slices. store,
+    # a BlobStore, makes pages and static assets hardlinks into it.
+    if shard is not None and search:
+        raise ValueError("a sharded build can't write the search index, which covers every page")
+    hash_source = hash_file if hashes is None else hashes.hash
+    # Each shard keeps its own manifest, so shards built one after another
+    # with the same state_dir don't mistake each other's pages for stale ones.
+    manifest_name = "manifest.json" if shard is None else f"manifest-{shard[0]}-of-{shard[1]}.json"
+    manifest_path = os.path.join(state_dir, manifest_name)
+    previous = load_manifest(manifest_path) if incremental else None
+    if previous is not None and previous.get("dest_dir") != os.path.normpath(dest_dir):
+        # Its outputs are in another directory: neither skip nor remove them.
+        previous = None
+    manifest = new_manifest(hash_source(template_path), basepath)
+    manifest["dest_dir"] = os.path.normpath(dest_dir)
+    manifest["minify"] = minify
+    manifest["fingerprint"] = fingerprint
+    manifest["parser"] = PARSER_VERSION
+    manifest["store"] = None if store is None else os.path.abspath(store.root)
+    if previous is not None and previous.get("store") != manifest["store"]:
+        # Outputs must be relinked into (or out of) the store, not skipped:
+        # forget the sizes and mtimes, keep the names to remove stale ones.
+        previous["assets"] = {relpath: [None, None] + entry[2:] for relpath, entry in previous["assets"].items()}
+
+    # Even a full build overwrites dest_dir in place, leaving identical
+    # outputs (and their mtimes) alone; what it didn't write goes at the end.
+    remove_temp_files(dest_dir)
+    with span("sync_static"):
+        manifest["assets"], _, _ = sync_directory(
+            static_dir, dest_dir, None if previous is None else previous.get("assets"),
+            method=sync_method, check_hash=check_hash, fingerprint=fingerprint, store=store)
+    assets = asset_urls(manifest["assets"])
+
+    # Pages embed fingerprinted names. A changed one re-renders the pages
+    # whose images and links point at it, or every page if the template does.
+    changed_paths = set() if previous is None else changed_assets(asset_urls(previous["assets"]), assets)
+    rebuild_all = (previous is None
+                   or previous["template"] != manifest["template"]
+                   or previous["basepath"] != basepath
+                   or previous.get("minify", False) != minify
+                   or previous.get("parser") != PARSER_VERSION
+                   or previous.get("store") != manifest["store"]
+                   or not changed_paths.isdisjoint(template_refs(template_path)))
+    old_pages = {} if previous is None else previous["pages"]
+    references = reference_index(old_pages)
+    affected = {from_path for path in changed_paths for from_path in references.get(path, ())}
+
+    search_index = None
+    if search:
+        search_index = SearchIndex(os.path.join(state_dir, "search.json"))
+        search_index.load()
+
+    all_pages = collect_pages(content_dir, dest_dir)
+    pages = all_pages if shard is None else select_shard(all_pages, content_dir, shard)
+    dirty = []
+    for from_path, dest_path in pages:
+        source_hash = hash_source(from_path)
+        manifest["pages"][from_path] = {"hash": source_hash, "dest": dest_path}
+        old = old_pages.get(from_path)
+        if (rebuild_all or old is None or old["hash"] != source_hash
+                or old["dest"] != dest_path or not os.path.exists(dest_path)
+                or from_path in affected
+                or (search_index is not None and not search_index.is_current(from_path, source_hash))):
+            dirty.append((from_path, dest_path))
+        else:
+            manifest["pages"][from_path]["refs"] = old["refs"]
+            print(f"SKIP - {from_path} unchanged")
+    texts = generate_pages(dirty, template_path, basepath, jobs, cache=cache,
+                           stream_over=stream_over, fsync=fsync, search=search, assets=assets or None,
+                           minify=minify, references=True, store=store)
+    if cache is not None:
+        cache.prune()
+    for from_path, page_text in texts.items():
+        manifest["pages"][from_path]["refs"] = page_text["refs"]
+
+    # Links may point at pages another shard renders.
+    for path, from_paths in missing_refs(reference_index(manifest["pages"]), manifest["assets"],
+                                         [dest_path for _, dest_path in all_pages], dest_dir):
+        print(f"WARNING - /{path} not found, referenced by {', '.join(from_paths)}")
+
+    if search_index is not None:
+        with span("search_index"):
+            # New pages get ids in path order, whatever order they were rendered in.
+            for from_path, page_text in sorted(texts.items()):
+                page = manifest["pages"][from_path]
+                search_index.update(from_path, page["hash"], page_url(page["dest"], dest_dir, basepath),
+                                    page_text["title"], page_text["terms"])
+            search_index.retain(manifest["pages"])
+            search_index.write(os.path.join(dest_dir, "search"), fsync)
+            search_index.save()
+
+    current_dests = {page["dest"] for page in manifest["pages"].values()}
+    if not incremental:
+        outputs = current_dests | {os.path.join(dest_dir, asset_dest(relpath, entry))
+                                   for relpath, entry in manifest["assets"].items()}
+        if search_index is not None:
+            outputs |= {os.path.join(dest_dir, "search", name) for name in search_index.files}
+        if shard is not None:
+            outputs.add(os.path.join(dest_dir, SHARD_MANIFEST))
+        remove_stale_files(dest_dir, outputs, gzip)
+    for from_path, old in old_pages.items():
+        if from_path not in manifest["pages"] and old["dest"] not in current_dests:
+            remove_output(old["dest"], dest_dir)
+
+    if gzip:
+        with span("compress"):
+            compress_directory(dest_dir, jobs)
+    elif previous is not None and previous.get("gzip"):
+        remove_stale_sidecars(dest_dir)
+    manifest["gzip"] = gzip
+
+    if store is not None:
+        with span("prune_store"):
+            pruned = store.prune()
+            if pruned is None:
+                print(f"SKIP - pruning {store.root}, another build is using it")
+            else:
+                print(f"PRUNED - {pruned} unreferenced blobs from {store.root}")
+
+    if shard is not None:
+        write_shard_manifest(dest_dir, shard, manifest, content_dir)
+    save_manifest(manifest_path, manifest)
+    return manifest
+
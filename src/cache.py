@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Bump whenever the parser or serializer output changes, so stale cache
+# entries are never served and incremental builds re-render every page.
+PARSER_VERSION = 2
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+DEFAULT_BLOCK_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def document_key(markdown):
+    digest = hashlib.sha256(f"{PARSER_VERSION}\0".encode())
+    digest.update(markdown.encode())
+    return digest.hexdigest()
+
+
+class DocumentCache():
+    # On-disk cache of rendered page content (before the template is applied),
+    # keyed by a hash of the markdown source and PARSER_VERSION. Entries are
+    # written with an atomic rename, so parallel workers can share one cache:
+    # a reader sees either a whole entry or none at all.
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+
+    def key(self, markdown):
+        return document_key(markdown)
+
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key[2:] + ".json")
+
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            # Reading counts as a use for LRU eviction.
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+
+    def put(self, key, entry):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+
+    def prune(self):
+        # Evicts least recently used entries until the cache fits max_bytes.
+        # Returns the number of entries removed.
+        entries = []
+        total = 0
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+
+class MemoryCache():
+    # DocumentCache kept in memory, for long-lived processes (the build
+    # daemon). Entries are evicted least recently used first once their
+    # content exceeds max_bytes.
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+
+
+    def key(self, markdown):
+        return document_key(markdown)
+
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+
+    def put(self, key, entry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old["content"])
+        self._entries[key] = entry
+        self.size += len(entry["content"])
+
+
+    def prune(self):
+        removed = 0
+        while self.size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted["content"])
+            removed += 1
+        return removed
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class BlockCache():
+    # In-memory LRU cache of serialized block HTML, keyed by a hash of the
+    # block's type and text. Long-lived processes (serve --watch) use it so
+    # that editing one block of a huge page only re-renders that block.
+
+    def __init__(self, max_bytes=DEFAULT_BLOCK_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def key(self, block_type, lines):
+        digest = hashlib.blake2b(block_type.value.encode(), digest_size=16)
+        digest.update(b"\0")
+        digest.update("\n".join(lines).encode())
+        return digest.digest()
+
+
+    def render(self, block_type, lines, render_block):
+        key = self.key(block_type, lines)
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+
+        html = render_block(block_type, lines)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = html
+                self.size += len(html)
+            while self.size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+        return html
+
+
+    def __len__(self):
+        return len(self._entries)
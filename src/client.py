@@ -0,0 +1,77 @@
+import json
+import os
+import socket
+import sys
+
+# Deliberately light on imports (no argparse either): this runs for every
+# build sent to the daemon.
+DEFAULT_SOCKET = os.path.join(".staticsite", "daemon.sock")
+USAGE = """\
+usage: client.py [--socket PATH] [--changed PATH]... [--stop] [--client-help] [main.py arguments]
+
+Forwards a build to `main.py daemon`, falling back to building in-process.
+  --socket PATH   daemon socket (default: .staticsite/daemon.sock)
+  --changed PATH  a file known to have changed, so the daemon doesn't trust its stat
+  --stop          stop the daemon"""
+
+
+def send_request(request, socket_path=DEFAULT_SOCKET, out=None):
+    # Sends one request to the daemon and copies its output to out as it
+    # arrives. Returns the exit status of the build.
+    out = out or sys.stdout
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(request) + "\n").encode())
+        with sock.makefile("r", encoding="utf-8") as replies:
+            for line in replies:
+                message = json.loads(line)
+                if "out" in message:
+                    out.write(message["out"])
+                else:
+                    return message["exit"]
+    raise ConnectionError("the daemon closed the connection mid-build")
+
+
+def parse_args(argv):
+    # Returns (socket path, changed paths, stop, arguments for main.py).
+    socket_path = DEFAULT_SOCKET
+    changed = []
+    stop = False
+    build_argv = []
+    args = iter(argv)
+    for arg in args:
+        name, _, value = arg.partition("=")
+        if name in ("--socket", "--changed"):
+            value = value or next(args, None)
+            if value is None:
+                sys.exit(f"{USAGE}\nclient.py: error: {name} needs a path")
+            if name == "--socket":
+                socket_path = value
+            else:
+                changed.append(os.path.relpath(value))
+        elif arg == "--stop":
+            stop = True
+        elif arg == "--client-help":
+            print(USAGE)
+            sys.exit(0)
+        else:
+            build_argv.append(arg)
+    return socket_path, changed, stop, build_argv
+
+
+def main(argv=None):
+    socket_path, changed, stop, build_argv = parse_args(sys.argv[1:] if argv is None else argv)
+    request = {"stop": True} if stop else {"argv": build_argv, "cwd": os.getcwd(), "changed": changed}
+    try:
+        return send_request(request, socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        if stop:
+            print(f"DAEMON - not running at {socket_path}", file=sys.stderr)
+            return 1
+    print(f"DAEMON - not running at {socket_path}, building in-process", file=sys.stderr)
+    from main import main as build_main
+    return build_main(build_argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
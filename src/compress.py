@@ -0,0 +1,88 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from output import write_output
+from sync import walk_files
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".svg", ".txt", ".xml")
+# Below this, the gzip header and the extra request overhead eat the savings.
+MIN_COMPRESS_BYTES = 256
+SIDECAR_SUFFIX = ".gz"
+
+
+def is_compressible(relpath, size, min_size=MIN_COMPRESS_BYTES):
+    return relpath.endswith(COMPRESSIBLE_EXTENSIONS) and size >= min_size
+
+
+def compress_directory(dest_dir, jobs=None, min_size=MIN_COMPRESS_BYTES):
+    # Writes a .gz sidecar next to every compressible file in dest_dir, for
+    # servers like nginx with gzip_static. A sidecar gets its source's mtime,
+    # so a source that wasn't rewritten since the last build is skipped
+    # without reading it. Sidecars of files now too small are deleted; those
+    # of removed outputs go with them in remove_output. Returns (compressed,
+    # skipped, removed).
+    sources, sidecars = scan_outputs(dest_dir)
+    current = {}
+    for relpath, stat in sidecars:
+        source_relpath = relpath[:-len(SIDECAR_SUFFIX)]
+        if is_compressible(source_relpath, sources[source_relpath].st_size, min_size):
+            current[relpath] = stat.st_mtime_ns
+        else:
+            print(f"REMOVING - {os.path.join(dest_dir, relpath)}")
+            os.remove(os.path.join(dest_dir, relpath))
+
+    changed = []
+    skipped = 0
+    for relpath, stat in sources.items():
+        if not is_compressible(relpath, stat.st_size, min_size):
+            continue
+        if current.get(relpath + SIDECAR_SUFFIX) == stat.st_mtime_ns:
+            skipped += 1
+        else:
+            changed.append(os.path.join(dest_dir, relpath))
+
+    if len(changed) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(compress_file, changed, chunksize=16))
+    else:
+        for path in changed:
+            compress_file(path)
+    return len(changed), skipped, len(sidecars) - len(current)
+
+
+def compress_file(path):
+    print(f"GZIP - {path}")
+    with open(path, "rb") as f:
+        data = f.read()
+    stat = os.stat(path)
+    # mtime=0 keeps the output deterministic, so an unchanged source gives a
+    # byte-identical sidecar.
+    sidecar = path + SIDECAR_SUFFIX
+    write_output(sidecar, gzip.compress(data, compresslevel=9, mtime=0))
+    os.utime(sidecar, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def remove_stale_sidecars(dest_dir):
+    # For builds without compression after one with it: a sidecar that no
+    # longer matches its source would be served instead of it, so drop it.
+    sources, sidecars = scan_outputs(dest_dir)
+    removed = 0
+    for relpath, stat in sidecars:
+        if sources[relpath[:-len(SIDECAR_SUFFIX)]].st_mtime_ns != stat.st_mtime_ns:
+            print(f"REMOVING - {os.path.join(dest_dir, relpath)}")
+            os.remove(os.path.join(dest_dir, relpath))
+            removed += 1
+    return removed
+
+
+def scan_outputs(dest_dir):
+    # Returns ({relpath: stat} of all files, [(relpath, stat)] of sidecars).
+    # A .gz file only counts as a sidecar next to its source, so a static
+    # archive.tar.gz is left alone.
+    if not os.path.isdir(dest_dir):
+        return {}, []
+    files = dict(walk_files(dest_dir))
+    sidecars = [(relpath, stat) for relpath, stat in files.items()
+                if relpath.endswith(SIDECAR_SUFFIX) and relpath[:-len(SIDECAR_SUFFIX)] in files]
+    return files, sidecars
@@ -0,0 +1,134 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+
+from cache import MemoryCache, DEFAULT_MEMORY_CACHE_BYTES
+from client import DEFAULT_SOCKET
+from main import build_command, COMMANDS
+from manifest import FileHashes
+from tracing import disable_tracing
+
+
+class ReplyWriter():
+    # Text stream that forwards writes to the client as {"out": text}
+    # messages. A client that went away doesn't abort the build.
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.closed = False
+
+
+    def write(self, text):
+        if text and not self.closed:
+            try:
+                self.wfile.write((json.dumps({"out": text}) + "\n").encode())
+            except OSError:
+                self.closed = True
+        return len(text)
+
+
+    def flush(self):
+        if not self.closed:
+            try:
+                self.wfile.flush()
+            except OSError:
+                self.closed = True
+
+
+class BuildDaemon():
+    # Runs builds in this process, one at a time, so imports, compiled
+    # templates, rendered page content and source hashes stay warm between
+    # them. It builds the directory it was started in.
+
+    def __init__(self, cache_bytes=DEFAULT_MEMORY_CACHE_BYTES):
+        self.cwd = os.getcwd()
+        self.cache = MemoryCache(cache_bytes)
+        self.hashes = FileHashes()
+
+
+    def run(self, request, out):
+        # Returns the build's exit status.
+        if os.path.realpath(request.get("cwd", self.cwd)) != os.path.realpath(self.cwd):
+            out.write(f"ERROR - this daemon builds {self.cwd}\n")
+            return 1
+        argv = request.get("argv", [])
+        if argv and argv[0] in COMMANDS:
+            out.write(f"ERROR - only builds can be sent to the daemon, not {argv[0]}\n")
+            return 1
+        for path in request.get("changed", ()):
+            self.hashes.forget(os.path.normpath(path))
+        try:
+            with redirect_stdout(out), redirect_stderr(out):
+                build_command(argv, self.cache, self.hashes)
+            return 0
+        except SystemExit as e:
+            # argparse errors and --help
+            return e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception:
+            out.write(traceback.format_exc())
+            return 1
+        finally:
+            disable_tracing()
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        if request.get("stop"):
+            self.reply({"exit": 0})
+            # shutdown() waits for serve_forever(), which is running this handler.
+            threading.Thread(target=self.server.shutdown).start()
+            return
+        start = time.perf_counter()
+        status = self.server.builder.run(request, ReplyWriter(self.wfile))
+        print(f"BUILD - {' '.join(request.get('argv', [])) or '/'} exited {status} "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        self.reply({"exit": status})
+
+
+    def reply(self, message):
+        try:
+            self.wfile.write((json.dumps(message) + "\n").encode())
+        except OSError:
+            pass
+
+
+def is_listening(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def serve_daemon(socket_path=DEFAULT_SOCKET, cache_bytes=DEFAULT_MEMORY_CACHE_BYTES):
+    if os.path.exists(socket_path):
+        if is_listening(socket_path):
+            print(f"ERROR - a daemon is already listening on {socket_path}")
+            return
+        # Left behind by a daemon that was killed.
+        os.remove(socket_path)
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+
+    server = socketserver.UnixStreamServer(socket_path, DaemonHandler)
+    server.builder = BuildDaemon(cache_bytes)
+    os.chmod(socket_path, 0o600)
+    print(f"LISTENING - {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
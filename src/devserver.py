@@ -0,0 +1,206 @@
+import mimetypes
+import os
+import shutil
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote, urlsplit
+
+from cache import BlockCache
+from sync import walk_files
+from utils import render_page
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = f'<script>new EventSource("{RELOAD_PATH}").onmessage = () => location.reload();</script>'
+
+
+class DevSite():
+    # Keeps every rendered page in memory and re-renders only what changed.
+
+    def __init__(self, content_dir='content', static_dir='static',
+                 template_path='template.html', basepath='/'):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.basepath = basepath
+        self.pages = {}    # url path -> rendered page bytes
+        self.sources = {}  # source path -> url path
+        self.stamps = {}   # watched path -> mtime_ns
+        self.block_cache = BlockCache()
+        self.version = 0
+        self.changed = threading.Condition()
+
+
+    def page_url(self, from_path):
+        relpath = os.path.relpath(from_path, self.content_dir).replace('.md', '.html')
+        return "/" + relpath.replace(os.sep, "/")
+
+
+    def render(self, from_path):
+        try:
+            page = render_page(from_path, self.template_path, self.basepath, block_cache=self.block_cache)
+        except Exception as e:
+            print(f"ERROR - {from_path}: {e!r}")
+            return False
+        url = self.sources.setdefault(from_path, self.page_url(from_path))
+        self.pages[url] = inject_reload_script(page).encode()
+        return True
+
+
+    def scan(self):
+        stamps = {}
+        for root in (self.content_dir, self.static_dir):
+            if os.path.isdir(root):
+                for relpath, stat in walk_files(root):
+                    stamps[os.path.join(root, relpath)] = stat.st_mtime_ns
+        stamps[self.template_path] = os.stat(self.template_path).st_mtime_ns
+        return stamps
+
+
+    def is_source(self, path):
+        return path.startswith(os.path.join(self.content_dir, ""))
+
+
+    def build(self):
+        self.stamps = self.scan()
+        for path in self.stamps:
+            if self.is_source(path):
+                self.render(path)
+        print(f"READY - {len(self.pages)} pages in memory")
+
+
+    def poll(self):
+        # Returns True when anything watched changed since the last poll.
+        try:
+            stamps = self.scan()
+        except OSError as e:
+            # A file renamed or deleted mid-scan, e.g. an editor saving by
+            # rename; the next poll sees the settled tree.
+            print(f"ERROR - scanning for changes: {e!r}")
+            return False
+        changed = [path for path, mtime in stamps.items() if self.stamps.get(path) != mtime]
+        removed = [path for path in self.stamps if path not in stamps]
+        self.stamps = stamps
+        if not changed and not removed:
+            return False
+
+        start = time.perf_counter()
+        if self.template_path in changed:
+            dirty = list(self.sources)
+        else:
+            dirty = [path for path in changed if self.is_source(path)]
+        for path in removed:
+            url = self.sources.pop(path, None)
+            if url is not None:
+                self.pages.pop(url, None)
+        for path in dirty:
+            self.render(path)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"REBUILT - {len(dirty)} page(s) in {elapsed:.1f} ms")
+
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+        return True
+
+
+    def watch(self, interval=0.05):
+        while True:
+            self.poll()
+            time.sleep(interval)
+
+
+    def lookup(self, path):
+        # Maps a request path to (page bytes, None) or (None, static file path).
+        if self.basepath != '/' and path.startswith(self.basepath):
+            path = "/" + path[len(self.basepath):]
+        if path.endswith("/"):
+            path += "index.html"
+        for candidate in (path, path + "/index.html"):
+            if candidate in self.pages:
+                return self.pages[candidate], None
+
+        static_root = os.path.abspath(self.static_dir)
+        file_path = os.path.abspath(os.path.join(static_root, path.lstrip("/")))
+        if file_path.startswith(static_root + os.sep) and os.path.isfile(file_path):
+            return None, file_path
+        return None, None
+
+
+def inject_reload_script(page):
+    index = page.rfind("</body>")
+    if index == -1:
+        return page + RELOAD_SCRIPT
+    return page[:index] + RELOAD_SCRIPT + page[index:]
+
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+
+    site = None
+
+    def do_GET(self):
+        path = unquote(urlsplit(self.path).path)
+        if path == RELOAD_PATH:
+            return self.stream_reloads()
+
+        page, file_path = self.site.lookup(path)
+        if page is not None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(page)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(page)
+        elif file_path is not None:
+            content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(os.path.getsize(file_path)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            with open(file_path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+        else:
+            self.send_error(404)
+
+
+    def stream_reloads(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        site = self.site
+        version = site.version
+        try:
+            while True:
+                with site.changed:
+                    site.changed.wait_for(lambda: site.version != version, timeout=15)
+                if site.version != version:
+                    version = site.version
+                    self.wfile.write(b"data: reload\n\n")
+                else:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def serve_watch(basepath='/', port=8888, interval=0.05, content_dir='content',
+                static_dir='static', template_path='template.html'):
+    site = DevSite(content_dir, static_dir, template_path, basepath)
+    site.build()
+    threading.Thread(target=site.watch, args=(interval,), daemon=True).start()
+
+    handler = type("Handler", (DevRequestHandler,), {"site": site})
+    run_server(ThreadingHTTPServer(("", port), handler))
+
+
+def run_server(server):
+    port = server.server_address[1]
+    print(f"SERVING - http://localhost:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,5 +1,28 @@
+# Built once; str.translate does the replacing in a single C-level pass.
+# Only "&" and "<" can start markup in text, and only "&" and the quote
+# character in a double-quoted attribute value; ">" is left as it is.
+TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;"})
+ATTRIBUTE_ESCAPES = str.maketrans({"&": "&amp;", '"': "&quot;"})
+
+
+def escape_text(text):
+    # Most text has nothing to escape; the substring checks are much cheaper
+    # than a translate (or a regex search) over it.
+    if "&" in text or "<" in text:
+        return text.translate(TEXT_ESCAPES)
+    return text
+
+
+def escape_attribute(value):
+    if "&" in value or '"' in value:
+        return value.translate(ATTRIBUTE_ESCAPES)
+    return value
+
+
 class HTMLNode():
 
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,16 +31,37 @@ class HTMLNode():
 
 
     def to_html(self):
+        fragments = []
+        write_html(self, fragments.append)
+        return "".join(fragments)
+
+
+    def html_parts(self):
+        # Returns (opening html, children or None, closing html or None).
         raise NotImplementedError()
 
 
     def props_to_html(self):
-        prop_str = ""
-        for prop_key in self.props:
-            f = prop_key + "=" + '"' + self.props[prop_key] + '"' + " "
-            prop_str += f
-        return prop_str.strip()
+        return " ".join(key + "=" + '"' + escape_attribute(value) + '"' for key, value in self.props.items())
 
 
     def __repr__(self):
         return f"{self.tag}, {self.value}, {self.children}, {self.props}"
+
+
+def write_html(node, write):
+    # Iterative depth-first walk, so deep trees can't hit the recursion limit
+    # and no intermediate strings are built for the subtrees.
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            write(item)
+            continue
+        start, children, end = item.html_parts()
+        write(start)
+        if children:
+            stack.append(end)
+            stack.extend(reversed(children))
+        elif end:
+            write(end)
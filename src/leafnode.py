@@ -1,17 +1,23 @@
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, TEXT_ESCAPES
 
 class LeafNode(HTMLNode):
 
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
     
-    def to_html(self):
-        if not self.value:
+    def html_parts(self):
+        value = self.value
+        if not value:
             raise ValueError()
+        # escape_text, inlined: this runs for every text node of every page.
+        if "&" in value or "<" in value:
+            value = value.translate(TEXT_ESCAPES)
         if not self.tag:
-            return self.value
+            return value, None, None
         if self.props:
-            return f"<{self.tag} {self.props_to_html()}>{self.value}</{self.tag}>"
+            return f"<{self.tag} {self.props_to_html()}>{value}</{self.tag}>", None, None
         else:
-            return f"<{self.tag}>{self.value}</{self.tag}>"
+            return f"<{self.tag}>{value}</{self.tag}>", None, None
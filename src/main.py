@@ -1,17 +1,157 @@
+import argparse
+import os
 import sys
 
-from textnode import TextNode
-from textnode import TextType
-from utils import clear_public_directory
-from utils import build_public_directory 
-from utils import generate_page
-from utils import generate_pages_recursive
+from build import build_site, STATE_DIR
+from cache import DocumentCache, DEFAULT_CACHE_BYTES, DEFAULT_MEMORY_CACHE_BYTES
+from store import BlobStore
+from shard import parse_shard, merge_shards, MergeConflict
+from server import serve_static, DEFAULT_CACHE_BYTES as DEFAULT_SERVER_CACHE_BYTES
+from sync import SYNC_METHODS
+from tracing import enable_tracing, write_trace, print_summary
 
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
 
-    clear_public_directory('docs')
-    build_public_directory('static', 'docs')
-    generate_pages_recursive('content', 'template.html', 'docs', basepath)
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+    return build_command(argv)
 
-main()
+
+def build_command(argv, cache=None, hashes=None):
+    # cache and hashes carry a long-lived caller's warm state (the build
+    # daemon); --cache takes precedence over cache.
+    parser = argparse.ArgumentParser(description="Build the static site into docs/")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only regenerate pages whose inputs changed since the last build")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                        help="render pages with a pool of N worker processes")
+    parser.add_argument("--sync-method", choices=SYNC_METHODS, default="copy",
+                        help="how changed static assets are copied into docs/")
+    parser.add_argument("--check-hash", action="store_true",
+                        help="also compare hashes of static assets whose size and mtime match")
+    parser.add_argument("--cache", nargs="?", const=os.path.join(STATE_DIR, "cache"), metavar="DIR",
+                        help="reuse parsed page content across builds (default DIR: %(const)s)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_BYTES // (1024 * 1024), metavar="MB",
+                        help="evict least recently used cache entries beyond this size")
+    parser.add_argument("--stream-over", type=float, metavar="MB",
+                        help="render pages whose source is at least MB megabytes block by block, "
+                             "without holding the whole page in memory (bypasses --cache)")
+    parser.add_argument("--fsync", action="store_true",
+                        help="fsync every written page before renaming it into place")
+    parser.add_argument("--search", action="store_true",
+                        help="write a sharded client-side search index to docs/search/")
+    parser.add_argument("--gzip", action="store_true",
+                        help="write .gz sidecars of text outputs for servers that serve them directly")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="copy static assets to content-hashed names and point pages at them")
+    parser.add_argument("--minify", action="store_true",
+                        help="collapse whitespace and drop redundant attribute quotes in pages")
+    parser.add_argument("--store", nargs="?", const=os.path.join(STATE_DIR, "store"), metavar="DIR",
+                        help="write each distinct page and asset once into a content-addressed store and "
+                             "hardlink the output to it (default DIR: %(const)s)")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="render only the I-th of N disjoint slices of the pages (combine them with `merge`)")
+    parser.add_argument("--out", default="docs", metavar="DIR", help="output directory (default: %(default)s)")
+    parser.add_argument("--state-dir", default=STATE_DIR, metavar="DIR",
+                        help="where --incremental keeps its manifest (default: %(default)s)")
+    parser.add_argument("--trace", metavar="OUT_JSON",
+                        help="write a Chrome trace of every build stage and page to OUT_JSON")
+    parser.add_argument("--trace-top", type=int, default=10, metavar="N",
+                        help="number of slowest pages to summarize when tracing")
+    args = parser.parse_args(argv)
+
+    if args.cache:
+        cache = DocumentCache(args.cache, args.cache_size * 1024 * 1024)
+    elif args.jobs > 1:
+        # An in-memory cache would be copied to every worker and its new
+        # entries lost.
+        cache = None
+
+    stream_over = None
+    if args.stream_over is not None:
+        stream_over = int(args.stream_over * 1024 * 1024)
+
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.search:
+            parser.error("--search needs every page and can't be combined with --shard")
+
+    if args.trace:
+        enable_tracing()
+    build_site(args.basepath, incremental=args.incremental, jobs=args.jobs,
+               sync_method=args.sync_method, check_hash=args.check_hash, cache=cache,
+               stream_over=stream_over, fsync=args.fsync, search=args.search,
+               gzip=args.gzip, fingerprint=args.fingerprint, minify=args.minify, hashes=hashes,
+               shard=shard, dest_dir=args.out, state_dir=args.state_dir,
+               store=None if args.store is None else BlobStore(args.store))
+    if args.trace:
+        write_trace(args.trace)
+        print_summary(args.trace_top)
+
+
+def serve_command(argv):
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Serve the site locally")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--watch", action="store_true",
+                        help="render pages in memory, re-render them on change and live-reload browsers")
+    parser.add_argument("--interval", type=float, default=0.05,
+                        help="seconds between polls of content/, static/ and template.html")
+    parser.add_argument("--directory", default="docs",
+                        help="directory to serve without --watch (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_SERVER_CACHE_BYTES // (1024 * 1024), metavar="MB",
+                        help="memory for caching small files without --watch")
+    args = parser.parse_args(argv)
+
+    if args.watch:
+        from devserver import serve_watch
+        serve_watch(args.basepath, args.port, args.interval)
+    else:
+        serve_static(args.directory, args.port, args.basepath, args.cache_size * 1024 * 1024)
+
+
+def merge_command(argv):
+    parser = argparse.ArgumentParser(prog="main.py merge",
+                                     description="Combine the outputs of `--shard i/N` builds into one tree")
+    parser.add_argument("shards", nargs="+", metavar="SHARD_DIR", help="the --out directory of every shard")
+    parser.add_argument("--out", default="docs", metavar="DIR", help="directory to merge into (default: %(default)s)")
+    parser.add_argument("--sync-method", choices=SYNC_METHODS, default="copy",
+                        help="how files are copied out of the shard directories")
+    args = parser.parse_args(argv)
+
+    try:
+        count = merge_shards(args.shards, args.out, args.sync_method)
+    except MergeConflict as e:
+        print(f"CONFLICT - {e}".replace("\n", "\nCONFLICT - "), file=sys.stderr)
+        return 1
+    print(f"MERGED - {count} files into {args.out}")
+
+
+def daemon_command(argv):
+    from client import DEFAULT_SOCKET
+    parser = argparse.ArgumentParser(prog="main.py daemon",
+                                     description="Run builds sent by src/client.py with warm caches")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket to listen on (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MEMORY_CACHE_BYTES // (1024 * 1024), metavar="MB",
+                        help="memory for rendered page content")
+    args = parser.parse_args(argv)
+
+    from daemon import serve_daemon
+    serve_daemon(args.socket, args.cache_size * 1024 * 1024)
+
+
+COMMANDS = {
+    "serve": serve_command,
+    "daemon": daemon_command,
+    "merge": merge_command,
+}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
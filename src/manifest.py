@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import time
+
+MANIFEST_VERSION = 2
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileHashes():
+    # Remembers file hashes in a long-lived process (the build daemon), so a
+    # file whose size, mtime and inode are unchanged isn't read again. A hash
+    # is only trusted if the file's mtime was well before it was taken: a
+    # later write within the same mtime tick could otherwise go unnoticed.
+
+    def __init__(self):
+        self._hashes = {}
+
+
+    def hash(self, path):
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        cached = self._hashes.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        hashed_at = time.time_ns()
+        digest = hash_file(path)
+        if stat.st_mtime_ns < hashed_at - 1_000_000_000:
+            self._hashes[path] = (key, digest)
+        return digest
+
+
+    def forget(self, path):
+        self._hashes.pop(path, None)
+
+
+def new_manifest(template_hash, basepath):
+    return {
+        "version": MANIFEST_VERSION,
+        "template": template_hash,
+        "basepath": basepath,
+        "pages": {},
+        "assets": {},
+    }
+
+
+def load_manifest(manifest_path):
+    # A missing, unreadable or outdated manifest just means "rebuild everything".
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(manifest_path, manifest):
+    directory = os.path.dirname(manifest_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
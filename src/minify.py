@@ -0,0 +1,160 @@
+import re
+
+# Whitespace next to these tags never renders, so it is dropped rather than
+# collapsed to one space.
+BLOCK_TAGS = frozenset((
+    "address", "article", "aside", "base", "blockquote", "body", "dd", "details", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "head",
+    "header", "hgroup", "hr", "html", "li", "link", "main", "meta", "nav", "noscript", "ol", "p", "pre",
+    "script", "section", "style", "table", "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul",
+))
+# Their content is copied verbatim up to the closing tag.
+RAW_TEXT_TAGS = frozenset(("pre", "textarea", "script", "style"))
+RAW_END_RES = {name: re.compile("</" + name, re.IGNORECASE) for name in RAW_TEXT_TAGS}
+
+HTML_SPACE = " \t\n\f\r"
+SPACE_RE = re.compile(r"[ \t\n\f\r]+")
+# A comment, or a tag with its name (lowercased later) as group 1.
+TOKEN_RE = re.compile(r"""<!--.*?-->|<(?!!--)/?([A-Za-z][A-Za-z0-9-]*)?[^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*>""",
+                      re.DOTALL)
+TAG_PART_RE = re.compile(r""""[^"]*"|'[^']*'|[ \t\n\f\r]+|[^ \t\n\f\r"']+""")
+# Attribute values that need no quotes.
+UNQUOTED_VALUE_RE = re.compile(r"""[^ \t\n\f\r"'=<>`]+""")
+
+
+class Minifier():
+    # Minifies HTML as it is written, fragment by fragment, without ever
+    # holding the whole page: whitespace runs collapse to one space (or
+    # vanish next to block tags) outside pre, textarea, script and style,
+    # and attribute quotes are dropped where the value doesn't need them.
+    # A tag or closing tag split across fragments is carried over until it
+    # is complete. Call close() after the last fragment.
+
+    def __init__(self, write):
+        self.out = write
+        self.carry = ""
+        self.raw_end = None
+        self.pending_space = False
+        self.after_block = True
+
+
+    def write(self, fragment):
+        self.feed(self.carry + fragment if self.carry else fragment, final=False)
+
+
+    def close(self):
+        self.feed(self.carry, final=True)
+
+
+    def feed(self, text, final):
+        out = []
+        position = 0
+        end = len(text)
+        while position < end:
+            if self.raw_end is not None:
+                close = self.raw_end.search(text, position)
+                if close is None:
+                    # Keep enough to recognize a closing tag split in two.
+                    cut = end if final else max(position, end - len(self.raw_end.pattern) + 1)
+                    out.append(text[position:cut])
+                    position = cut
+                    break
+                out.append(text[position:close.start()])
+                position = close.start()
+                self.raw_end = None
+
+            tag_at = text.find("<", position)
+            if tag_at == -1:
+                self.text(text[position:], out)
+                position = end
+                break
+            self.text(text[position:tag_at], out)
+            position = tag_at
+
+            following = text[tag_at + 1:tag_at + 2]
+            if following and not (following.isalpha() or following in "/!?"):
+                # A lone "<" in text, like "< Back Home".
+                self.text("<", out)
+                position = tag_at + 1
+                continue
+            match = TOKEN_RE.match(text, tag_at)
+            if match is None:
+                # An incomplete tag or comment waits for the next fragment.
+                if final:
+                    self.text(text[tag_at:], out)
+                    position = end
+                break
+            name = match.group(1)
+            self.tag(match.group(), name and name.lower(), out)
+            position = match.end()
+
+        self.carry = text[position:]
+        if out:
+            self.out("".join(out))
+
+
+    def text(self, text, out):
+        if not text:
+            return
+        collapsed = SPACE_RE.sub(" ", text)
+        content = collapsed.strip(" ")
+        if not content:
+            self.pending_space = True
+            return
+        if (self.pending_space or collapsed[0] == " ") and not self.after_block:
+            out.append(" ")
+        out.append(content)
+        self.pending_space = collapsed[-1] == " "
+        self.after_block = False
+
+
+    def tag(self, tag, name, out):
+        if name is None:
+            # Comments and doctypes render nothing, so whitespace around them
+            # is handled as if they weren't there.
+            out.append(tag)
+            return
+        is_block = name in BLOCK_TAGS
+        if self.pending_space and not self.after_block and not is_block:
+            out.append(" ")
+        self.pending_space = False
+        self.after_block = is_block
+        if tag.startswith("</"):
+            out.append(tag)
+            return
+        out.append(minify_tag(tag))
+        if name in RAW_TEXT_TAGS and not tag.endswith("/>"):
+            self.raw_end = RAW_END_RES[name]
+
+
+def minify_tag(tag):
+    # Collapses whitespace between attributes and drops quotes from values
+    # that don't need them. A value followed directly by "/" keeps its
+    # quotes: unquoted, the "/" would become part of it. So does one ending
+    # in "/", which lenient parsers may read as a self-closing tag.
+    parts = TAG_PART_RE.findall(tag)
+    result = []
+    for index, part in enumerate(parts):
+        if part[0] in HTML_SPACE:
+            following = parts[index + 1] if index + 1 < len(parts) else ""
+            if following != ">":
+                result.append(" ")
+        elif part[0] in "\"'":
+            following = parts[index + 1] if index + 1 < len(parts) else ""
+            value = part[1:-1]
+            if (result and result[-1].endswith("=") and UNQUOTED_VALUE_RE.fullmatch(value)
+                    and not value.endswith("/") and (following[:1] in HTML_SPACE or following[:1] == ">")):
+                result.append(value)
+            else:
+                result.append(part)
+        else:
+            result.append(part)
+    return "".join(result)
+
+
+def minify(html):
+    fragments = []
+    minifier = Minifier(fragments.append)
+    minifier.write(html)
+    minifier.close()
+    return "".join(fragments)
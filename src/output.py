@@ -0,0 +1,111 @@
+import filecmp
+import os
+import re
+import threading
+
+# Names temp_path() and BlobStore.temp_path() give their temporary files.
+TEMP_NAME_RE = re.compile(r"\.(?:.+\.)?\d+\.\d+\.tmp")
+
+
+def temp_path(dest_path):
+    # Same directory as dest_path, so os.replace never crosses filesystems.
+    name = f".{os.path.basename(dest_path)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    return os.path.join(os.path.dirname(dest_path), name)
+
+
+def remove_temp_files(directory):
+    # Deletes temporary files left behind by a build that crashed before it
+    # could replace or remove them. Returns how many.
+    removed = 0
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if TEMP_NAME_RE.fullmatch(filename):
+                path = os.path.join(dirpath, filename)
+                print(f"REMOVING - {path}")
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def write_output(dest_path, data, fsync=False, store=None):
+    # Atomically replaces dest_path with data (str or bytes). Returns False,
+    # leaving the file and its mtime untouched, if it already holds exactly
+    # these bytes. With store, a BlobStore, dest_path becomes a hardlink to
+    # the data's blob.
+    if store is not None:
+        return store.write(dest_path, data, fsync)
+    if isinstance(data, str):
+        data = data.encode()
+    if same_contents(dest_path, data):
+        return False
+    with AtomicOutput(dest_path, "wb", fsync, compare=False) as f:
+        f.write(data)
+    return True
+
+
+class AtomicOutput():
+    # Context manager yielding a temporary file that replaces dest_path once
+    # the block exits without an error, so readers see the old file or the
+    # new one, never a partial write. With compare, a result identical to the
+    # existing file is discarded instead; changed records which happened.
+    # With store, the file is written into the BlobStore and dest_path
+    # linked to it.
+
+    def __init__(self, dest_path, mode="w", fsync=False, compare=True, store=None):
+        self.dest_path = dest_path
+        self.tmp_path = temp_path(dest_path) if store is None else store.temp_path()
+        self.mode = mode
+        self.fsync = fsync
+        self.compare = compare
+        self.store = store
+        self.changed = None
+        self.file = None
+
+
+    def __enter__(self):
+        self.file = open(self.tmp_path, self.mode)
+        return self.file
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None and self.fsync:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            self.file.close()
+            if exc_type is not None:
+                return False
+            if self.store is not None:
+                self.changed = self.store.commit(self.tmp_path, self.dest_path, self.fsync)
+                return False
+            if (self.compare and os.path.isfile(self.dest_path)
+                    and filecmp.cmp(self.tmp_path, self.dest_path, shallow=False)):
+                self.changed = False
+                return False
+            os.replace(self.tmp_path, self.dest_path)
+            self.changed = True
+            if self.fsync:
+                fsync_directory(os.path.dirname(self.dest_path))
+        finally:
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+        return False
+
+
+def same_contents(path, data):
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def fsync_directory(dir_path):
+    # Makes the rename itself durable.
+    fd = os.open(dir_path or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,53 @@
+import os
+
+from template import load_template, ROOT_URL_PATH_RE
+
+
+def ref_path(url):
+    # The site-relative path of a root-relative URL, the form rebase_urls
+    # and asset_urls use; None for external and relative URLs.
+    if not url.startswith("/") or url.startswith("//"):
+        return None
+    return url[1:].split("#", 1)[0].split("?", 1)[0]
+
+
+def reference_index(pages):
+    # Maps each path referenced by an IMAGE or LINK node to the sorted source
+    # paths of the pages that reference it.
+    index = {}
+    for from_path, page in pages.items():
+        for url in page.get("refs", ()):
+            path = ref_path(url)
+            if path is not None:
+                index.setdefault(path, set()).add(from_path)
+    return {path: sorted(from_paths) for path, from_paths in index.items()}
+
+
+def template_refs(template_path):
+    # Paths referenced by the template's own href and src attributes.
+    template = load_template(template_path)
+    return {match.group(2) for is_placeholder, text in template.segments if not is_placeholder
+            for match in ROOT_URL_PATH_RE.finditer(text)}
+
+
+def changed_assets(old_urls, new_urls):
+    # Paths whose fingerprinted name was added, removed or changed between
+    # two asset_urls maps.
+    return {path for path in old_urls.keys() | new_urls.keys() if old_urls.get(path) != new_urls.get(path)}
+
+
+def missing_refs(index, assets, page_dests, dest_dir):
+    # Yields (path, from_paths) of referenced paths that are neither a static
+    # asset nor a page. A page can be linked as dir/, dir or dir/index.html.
+    targets = {relpath.replace(os.sep, "/") for relpath in assets}
+    for dest_path in page_dests:
+        url = os.path.relpath(dest_path, dest_dir).replace(os.sep, "/")
+        targets.add(url)
+        if url == "index.html":
+            targets.add("")
+        elif url.endswith("/index.html"):
+            targets.add(url[:-len("index.html")])
+            targets.add(url[:-len("/index.html")])
+    for path, from_paths in sorted(index.items()):
+        if path not in targets:
+            yield path, from_paths
@@ -0,0 +1,188 @@
+import json
+import os
+import re
+
+from output import write_output
+
+SEARCH_VERSION = 1
+# Terms are sharded by their first SHARD_PREFIX characters, so a browser
+# fetches one small shard per query term instead of the whole index.
+SHARD_PREFIX = 2
+
+TERM_RE = re.compile(r"\w+")
+SHARD_NAME_RE = re.compile(r"[a-z0-9]+")
+
+SEARCH_SCRIPT = """\
+// Client for the search index in this directory: await search("query")
+// resolves to [{url, title}] of the pages containing every query term.
+const SEARCH_ROOT = new URL(".", document.currentScript.src);
+let searchIndex = null;
+
+async function fetchSearchJSON(name) {
+  const response = await fetch(new URL(name, SEARCH_ROOT));
+  return response.ok ? response.json() : null;
+}
+
+function searchShardName(term, prefix) {
+  const head = Array.from(term).slice(0, prefix).join("");
+  if (/^[a-z0-9]+$/.test(head)) return head;
+  const bytes = new TextEncoder().encode(head);
+  return "_" + Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("");
+}
+
+async function search(query) {
+  searchIndex = searchIndex || await fetchSearchJSON("index.json");
+  const terms = query.toLowerCase().match(/[\\p{L}\\p{N}_]+/gu) || [];
+  let ids = null;
+  for (const term of terms) {
+    const name = searchShardName(term, searchIndex.prefix);
+    const shard = searchIndex.shards.includes(name) ? await fetchSearchJSON(name + ".json") : null;
+    let id = 0;
+    const found = new Set(((shard && shard[term]) || []).map((delta) => (id += delta)));
+    ids = ids === null ? found : new Set([...ids].filter((page) => found.has(page)));
+  }
+  return [...(ids || [])].map((page) => ({url: searchIndex.pages[page][0], title: searchIndex.pages[page][1]}));
+}
+"""
+
+
+def tokenize(text):
+    return TERM_RE.findall(text.lower())
+
+
+def shard_name(term):
+    prefix = term[:SHARD_PREFIX]
+    if SHARD_NAME_RE.fullmatch(prefix):
+        return prefix
+    return "_" + prefix.encode().hex()
+
+
+def delta_encode(ids):
+    deltas = []
+    previous = 0
+    for page_id in ids:
+        deltas.append(page_id - previous)
+        previous = page_id
+    return deltas
+
+
+def delta_decode(deltas):
+    ids = []
+    page_id = 0
+    for delta in deltas:
+        page_id += delta
+        ids.append(page_id)
+    return ids
+
+
+def page_url(dest_path, dest_dir, basepath='/'):
+    url = os.path.relpath(dest_path, dest_dir).replace(os.sep, "/")
+    if url == "index.html":
+        url = ""
+    elif url.endswith("/index.html"):
+        url = url[:-len("index.html")]
+    return basepath + url
+
+
+class SearchIndex():
+    # Terms of every page, kept in the build state so an incremental build
+    # only needs the text of the pages it re-rendered. Page ids are assigned
+    # once per source path and never reused, so unchanged pages keep their
+    # ids and most shards come out byte-identical. files are the names the
+    # last write produced, the only ones a later write may delete.
+
+    def __init__(self, state_path):
+        self.state_path = state_path
+        self.pages = {}
+        self.next_id = 0
+        self.files = []
+
+
+    def load(self):
+        # A missing or outdated state just means every page gets re-indexed.
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(state, dict) or state.get("version") != SEARCH_VERSION:
+            return
+        self.pages = state["pages"]
+        self.next_id = state["next_id"]
+        self.files = state.get("files", [])
+
+
+    def save(self):
+        state = {"version": SEARCH_VERSION, "next_id": self.next_id, "pages": self.pages,
+                 "files": self.files}
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        write_output(self.state_path, json.dumps(state, sort_keys=True))
+
+
+    def is_current(self, from_path, source_hash):
+        page = self.pages.get(from_path)
+        return page is not None and page["hash"] == source_hash
+
+
+    def update(self, from_path, source_hash, url, title, terms):
+        page = self.pages.get(from_path)
+        page_id = self.next_id if page is None else page["id"]
+        if page is None:
+            self.next_id += 1
+        self.pages[from_path] = {"id": page_id, "hash": source_hash, "url": url,
+                                 "title": title, "terms": sorted(terms)}
+
+
+    def retain(self, from_paths):
+        for from_path in [path for path in self.pages if path not in from_paths]:
+            del self.pages[from_path]
+
+
+    def shards(self):
+        # Returns {shard name: {term: delta-encoded page ids}}.
+        postings = {}
+        for page in self.pages.values():
+            for term in page["terms"]:
+                postings.setdefault(term, []).append(page["id"])
+        shards = {}
+        for term, ids in postings.items():
+            shards.setdefault(shard_name(term), {})[term] = delta_encode(sorted(ids))
+        return shards
+
+
+    def write(self, out_dir, fsync=False):
+        # Writes index.json, one JSON file per shard and the client script.
+        # Files whose bytes are unchanged are left alone, and files an
+        # earlier write produced that are no longer needed are removed with
+        # their .gz sidecars; anything else in out_dir, such as a page, is
+        # not the index's. Returns the number of files written.
+        os.makedirs(out_dir, exist_ok=True)
+        shards = self.shards()
+        pages = [None] * self.next_id
+        for page in self.pages.values():
+            pages[page["id"]] = [page["url"], page["title"]]
+
+        files = {
+            "index.json": {"version": SEARCH_VERSION, "prefix": SHARD_PREFIX,
+                           "shards": sorted(shards), "pages": pages},
+            "search.js": SEARCH_SCRIPT,
+        }
+        for name, shard in shards.items():
+            files[name + ".json"] = shard
+
+        written = 0
+        for name, data in files.items():
+            if not isinstance(data, str):
+                data = json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+            if write_output(os.path.join(out_dir, name), data, fsync):
+                print(f"SEARCH - {os.path.join(out_dir, name)}")
+                written += 1
+
+        for name in self.files:
+            if name not in files:
+                for path in (os.path.join(out_dir, name), os.path.join(out_dir, name + ".gz")):
+                    if os.path.exists(path):
+                        print(f"REMOVING - {path}")
+                        os.remove(path)
+        self.files = sorted(files)
+        return written
@@ -0,0 +1,350 @@
+import asyncio
+import mimetypes
+import os
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+
+from compress import COMPRESSIBLE_EXTENSIONS, SIDECAR_SUFFIX
+from sync import FINGERPRINT_RE
+
+# Files up to CACHE_FILE_BYTES are kept in memory, up to DEFAULT_CACHE_BYTES
+# in total; larger ones are sent from disk with sendfile().
+CACHE_FILE_BYTES = 256 * 1024
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+KEEPALIVE_TIMEOUT = 15
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class Representation():
+    # One file as it will be sent: its validators plus either the bytes (for
+    # cached small files) or an open file to sendfile() from.
+
+    __slots__ = ("size", "mtime_ns", "etag", "last_modified", "data", "file")
+
+    def __init__(self, stat, data=None, file=None):
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        # An atomically replaced file gets a new inode, hence a new ETag.
+        self.etag = f'"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.data = data
+        self.file = file
+
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class StaticSite():
+    # Maps request targets to files under root and keeps an LRU cache of the
+    # small ones. Every request still stats the file, so a rebuild of the
+    # directory is picked up immediately.
+
+    def __init__(self, root, basepath='/', cache_bytes=DEFAULT_CACHE_BYTES, cache_file_bytes=CACHE_FILE_BYTES):
+        self.root = os.path.abspath(root)
+        self.basepath = basepath
+        self.cache_bytes = cache_bytes
+        self.cache_file_bytes = cache_file_bytes
+        self.cache_size = 0
+        self._cache = OrderedDict()
+
+
+    def resolve(self, target):
+        # Returns (file path, None), (None, redirect location) or (None, None).
+        url = urlsplit(target)
+        path = unquote(url.path)
+        if "\0" in path:
+            return None, None
+        if self.basepath != '/':
+            if not path.startswith(self.basepath):
+                return None, None
+            path = "/" + path[len(self.basepath):]
+        file_path = os.path.abspath(os.path.join(self.root, path.lstrip("/")))
+        if file_path != self.root and not file_path.startswith(self.root + os.sep):
+            return None, None
+        if os.path.isdir(file_path):
+            if not path.endswith("/"):
+                return None, url._replace(path=url.path + "/").geturl()
+            file_path = os.path.join(file_path, "index.html")
+        if os.path.isfile(file_path):
+            return file_path, None
+        return None, None
+
+
+    def select(self, file_path, accept_encoding):
+        # Picks the gzip sidecar written by --gzip when the client accepts it
+        # and the sidecar matches the file. Returns (path, encoding, vary).
+        if not file_path.endswith(COMPRESSIBLE_EXTENSIONS):
+            return file_path, None, False
+        try:
+            sidecar_stat = os.stat(file_path + SIDECAR_SUFFIX)
+            file_stat = os.stat(file_path)
+        except OSError:
+            return file_path, None, False
+        if sidecar_stat.st_mtime_ns != file_stat.st_mtime_ns:
+            return file_path, None, False
+        if accepts_gzip(accept_encoding):
+            return file_path + SIDECAR_SUFFIX, "gzip", True
+        return file_path, None, True
+
+
+    def load(self, file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if stat.st_size > self.cache_file_bytes:
+            # Validators come from the open file, so a concurrent rebuild
+            # can't make them disagree with the bytes that are sent.
+            file = open(file_path, "rb")
+            return Representation(os.fstat(file.fileno()), file=file)
+
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(file_path)
+        if cached is not None and cached[0] == key:
+            self._cache.move_to_end(file_path)
+            return Representation(stat, data=cached[1])
+
+        with open(file_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        self.store(file_path, (stat.st_ino, stat.st_mtime_ns, stat.st_size), data)
+        return Representation(stat, data=data)
+
+
+    def store(self, file_path, key, data):
+        old = self._cache.pop(file_path, None)
+        if old is not None:
+            self.cache_size -= len(old[1])
+        self._cache[file_path] = (key, data)
+        self.cache_size += len(data)
+        while self.cache_size > self.cache_bytes and self._cache:
+            _, (_, evicted) = self._cache.popitem(last=False)
+            self.cache_size -= len(evicted)
+
+
+def accepts_gzip(accept_encoding):
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def parse_range(header, size):
+    # Returns (first, last) byte positions of a single "bytes=" range, or None
+    # if the header should be ignored (multiple ranges, other units, syntax
+    # errors). Raises RangeNotSatisfiable if it starts past the end.
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - length), size - 1
+        first = int(first)
+        last = int(last) if last else None
+    except ValueError:
+        return None
+    if first < 0 or (last is not None and last < first):
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable()
+    return first, size - 1 if last is None else min(last, size - 1)
+
+
+def is_not_modified(headers, representation):
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or representation.etag in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return representation.mtime_ns // 1_000_000_000 <= since
+    return False
+
+
+def cache_control(file_path):
+    # A fingerprinted name changes with its content, so it never needs to be
+    # revalidated. Everything else is revalidated; the validators make that
+    # a cheap 304.
+    if FINGERPRINT_RE.search(os.path.basename(file_path)):
+        return "public, max-age=31536000, immutable"
+    return "no-cache"
+
+
+def content_type(file_path):
+    guessed = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+    if guessed.startswith("text/"):
+        guessed += "; charset=utf-8"
+    return guessed
+
+
+def parse_request(head):
+    # Returns (method, target, version, headers) or None if malformed.
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ")
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        return None
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            return None
+        headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], parts[2], headers
+
+
+class StaticServer():
+
+    def __init__(self, site):
+        self.site = site
+
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                    break
+                request = parse_request(head)
+                if request is None:
+                    await self.send(writer, 400, {}, b"", keep_alive=False)
+                    break
+                if not await self.respond(writer, *request):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+    async def respond(self, writer, method, target, version, headers):
+        # Returns whether the connection stays open.
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+        if "content-length" in headers or "transfer-encoding" in headers:
+            # GET and HEAD bodies are never used; don't try to skip over them.
+            keep_alive = False
+
+        if method not in ("GET", "HEAD"):
+            return await self.send(writer, 405, {"Allow": "GET, HEAD"}, b"", keep_alive)
+        file_path, location = self.site.resolve(target)
+        if location is not None:
+            return await self.send(writer, 301, {"Location": location}, b"", keep_alive)
+        if file_path is None:
+            return await self.send(writer, 404, {"Content-Type": "text/plain; charset=utf-8"},
+                                   b"404 Not Found\n", keep_alive, method)
+
+        selected_path, encoding, vary = self.site.select(file_path, headers.get("accept-encoding"))
+        representation = self.site.load(selected_path)
+        if representation is None:
+            return await self.send(writer, 404, {}, b"", keep_alive, method)
+        try:
+            response_headers = {
+                "Content-Type": content_type(file_path),
+                "ETag": representation.etag,
+                "Last-Modified": representation.last_modified,
+                "Cache-Control": cache_control(file_path),
+                "Accept-Ranges": "bytes",
+            }
+            if encoding is not None:
+                response_headers["Content-Encoding"] = encoding
+            if vary:
+                response_headers["Vary"] = "Accept-Encoding"
+
+            if is_not_modified(headers, representation):
+                return await self.send(writer, 304, response_headers, b"", keep_alive, "HEAD")
+
+            status = 200
+            first, last = 0, representation.size - 1
+            range_header = headers.get("range")
+            if range_header is not None and headers.get("if-range", representation.etag) == representation.etag:
+                try:
+                    byte_range = parse_range(range_header, representation.size)
+                except RangeNotSatisfiable:
+                    response_headers["Content-Range"] = f"bytes */{representation.size}"
+                    return await self.send(writer, 416, response_headers, b"", keep_alive)
+                if byte_range is not None:
+                    status = 206
+                    first, last = byte_range
+                    response_headers["Content-Range"] = f"bytes {first}-{last}/{representation.size}"
+
+            if representation.data is not None:
+                body = representation.data[first:last + 1]
+                return await self.send(writer, status, response_headers, body, keep_alive, method)
+            return await self.send_file(writer, status, response_headers, representation.file,
+                                        first, last + 1 - first, keep_alive, method)
+        finally:
+            representation.close()
+
+
+    async def send(self, writer, status, headers, body, keep_alive, method="GET"):
+        writer.write(self.response_head(status, headers, len(body), keep_alive))
+        if method != "HEAD":
+            writer.write(body)
+        await writer.drain()
+        return keep_alive
+
+
+    async def send_file(self, writer, status, headers, file, offset, count, keep_alive, method="GET"):
+        writer.write(self.response_head(status, headers, count, keep_alive))
+        await writer.drain()
+        if method != "HEAD" and count > 0:
+            await asyncio.get_running_loop().sendfile(writer.transport, file, offset, count)
+        return keep_alive
+
+
+    def response_head(self, status, headers, content_length, keep_alive):
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                 f"Date: {formatdate(usegmt=True)}",
+                 "Server: staticsite"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        if status != 304:
+            lines.append(f"Content-Length: {content_length}")
+        if not keep_alive:
+            lines.append("Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def start_server(site, host="", port=8888):
+    server = StaticServer(site)
+    return await asyncio.start_server(server.handle, host or None, port)
+
+
+def serve_static(directory='docs', port=8888, basepath='/', cache_bytes=DEFAULT_CACHE_BYTES):
+    async def run():
+        server = await start_server(StaticSite(directory, basepath, cache_bytes), "", port)
+        print(f"SERVING - http://localhost:{port}{basepath}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+
+from manifest import hash_file
+from output import write_output
+from sync import walk_files, sync_file
+from utils import clear_public_directory
+
+SHARD_MANIFEST = ".shard-manifest.json"
+SHARD_MANIFEST_VERSION = 2
+# Build settings every shard of one build must share.
+SHARD_SETTINGS = ("basepath", "template", "minify", "fingerprint", "parser", "gzip")
+
+
+class MergeConflict(Exception):
+    pass
+
+
+def parse_shard(text):
+    # "i/N" with 1 <= i <= N -> (i, N)
+    index, sep, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, not {text!r}")
+    if not sep or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"shard must look like i/N with 1 <= i <= N, not {text!r}")
+    return index, count
+
+
+def shard_of(relpath, count):
+    # 1-based shard of a content file. Hashing the path with / separators
+    # gives every machine the same answer, whatever its OS or listdir order.
+    digest = hashlib.sha256(relpath.replace(os.sep, "/").encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def select_shard(pages, content_dir, shard):
+    index, count = shard
+    return [(from_path, dest_path) for from_path, dest_path in pages
+            if shard_of(os.path.relpath(from_path, content_dir), count) == index]
+
+
+def write_shard_manifest(dest_dir, shard, manifest, content_dir):
+    # Records what this shard rendered and the hash of every file in its
+    # output, for merge_shards to check against the other shards.
+    files = {relpath.replace(os.sep, "/"): hash_file(os.path.join(dest_dir, relpath))
+             for relpath, _ in walk_files(dest_dir) if relpath != SHARD_MANIFEST}
+    pages = {os.path.relpath(from_path, content_dir).replace(os.sep, "/"):
+             os.path.relpath(page["dest"], dest_dir).replace(os.sep, "/")
+             for from_path, page in manifest["pages"].items()}
+    shard_manifest = {
+        "version": SHARD_MANIFEST_VERSION,
+        "shard": list(shard),
+        "pages": pages,
+        "files": files,
+    }
+    for key in SHARD_SETTINGS:
+        shard_manifest[key] = manifest[key]
+    write_output(os.path.join(dest_dir, SHARD_MANIFEST), json.dumps(shard_manifest, indent=1, sort_keys=True))
+
+
+def load_shard_manifest(shard_dir):
+    path = os.path.join(shard_dir, SHARD_MANIFEST)
+    try:
+        with open(path, "r") as f:
+            shard_manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise MergeConflict(f"{path}: unreadable shard manifest ({e})")
+    if not isinstance(shard_manifest, dict) or shard_manifest.get("version") != SHARD_MANIFEST_VERSION:
+        raise MergeConflict(f"{path}: unsupported shard manifest version")
+    return shard_manifest
+
+
+def check_shards(shard_dirs):
+    # Returns {relpath: shard dir to copy it from}. Raises MergeConflict if
+    # the shards don't form exactly one complete build, if a file no longer
+    # matches its shard manifest, or if two shards disagree on a file.
+    manifests = [(shard_dir, load_shard_manifest(shard_dir)) for shard_dir in shard_dirs]
+    problems = []
+
+    first = manifests[0][1]
+    count = first["shard"][1]
+    seen = {}
+    for shard_dir, shard_manifest in manifests:
+        index, shard_count = shard_manifest["shard"]
+        for key in SHARD_SETTINGS:
+            if shard_manifest[key] != first[key]:
+                problems.append(f"{shard_dir}: {key} differs from {shard_dirs[0]}")
+        if shard_count != count:
+            problems.append(f"{shard_dir}: shard {index}/{shard_count} of a {count}-way build")
+        elif index in seen:
+            problems.append(f"{shard_dir}: shard {index}/{count} also in {seen[index]}")
+        else:
+            seen[index] = shard_dir
+    missing = [str(index) for index in range(1, count + 1) if index not in seen]
+    if missing:
+        problems.append(f"missing shards {', '.join(missing)} of {count}")
+
+    page_owners = {}
+    sources = {}
+    hashes = {}
+    if problems:
+        raise MergeConflict("\n".join(problems))
+
+    for shard_dir, shard_manifest in manifests:
+        for page in shard_manifest["pages"]:
+            if page in page_owners:
+                problems.append(f"{page}: rendered by both {page_owners[page]} and {shard_dir}")
+            page_owners[page] = shard_dir
+        for relpath, recorded in shard_manifest["files"].items():
+            try:
+                digest = hash_file(os.path.join(shard_dir, relpath))
+            except OSError:
+                problems.append(f"{relpath}: missing from {shard_dir}")
+                continue
+            if digest != recorded:
+                problems.append(f"{relpath}: changed in {shard_dir} since the shard was built")
+            elif relpath not in sources:
+                sources[relpath] = shard_dir
+                hashes[relpath] = digest
+            elif hashes[relpath] != digest:
+                # Identical copies (static assets every shard syncs) are fine.
+                problems.append(f"{relpath}: differs between {sources[relpath]} and {shard_dir}")
+
+    if problems:
+        raise MergeConflict("\n".join(problems))
+    return sources
+
+
+def merge_shards(shard_dirs, dest_dir, method="copy"):
+    # Combines the outputs of a complete set of --shard builds into
+    # dest_dir. Nothing is written unless every check passes. Returns the
+    # number of files merged.
+    print(f"STARTED - merge_shards {' '.join(shard_dirs)} TO {dest_dir}")
+    if os.path.abspath(dest_dir) in {os.path.abspath(shard_dir) for shard_dir in shard_dirs}:
+        raise MergeConflict(f"{dest_dir}: can't merge into one of the shards")
+    sources = check_shards(shard_dirs)
+    clear_public_directory(dest_dir)
+    for directory in sorted({os.path.dirname(relpath) for relpath in sources}):
+        os.makedirs(os.path.join(dest_dir, directory), exist_ok=True)
+    for relpath, shard_dir in sorted(sources.items()):
+        sync_file(os.path.join(shard_dir, relpath), os.path.join(dest_dir, relpath), method)
+    return len(sources)
@@ -0,0 +1,184 @@
+import errno
+import fcntl
+import filecmp
+import os
+import shutil
+import stat
+import threading
+
+from manifest import hash_bytes, hash_file
+from output import temp_path, fsync_directory, TEMP_NAME_RE
+
+# Errors from os.link() that mean "can't hardlink here", not "something is
+# wrong": another filesystem, no hardlink support, or too many links.
+LINK_FALLBACK_ERRNOS = (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP)
+LOCK_NAME = ".lock"
+
+
+class BlobStore():
+    # Content-addressed store: every distinct output is written once, to
+    # root/ab/cdef... named by its SHA-256, and outputs are hardlinks to it.
+    # Identical pages and assets, and unchanged files across versioned
+    # copies of the site, then share one inode. Blobs are read-only, so an
+    # output edited in place can't silently change its twins. Several builds
+    # may share a store (versioned copies of the site): each holds a shared
+    # lock on it from its first write until prune(), which only deletes
+    # anything if it can take the lock exclusively.
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = None
+
+
+    def __getstate__(self):
+        # Page workers get a copy without the lock and take their own.
+        return {"root": self.root, "_lock": None}
+
+
+    def hold(self):
+        if self._lock is None:
+            os.makedirs(self.root, exist_ok=True)
+            self._lock = open(os.path.join(self.root, LOCK_NAME), "a")
+            fcntl.flock(self._lock, fcntl.LOCK_SH)
+
+
+    def release(self):
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+
+    def temp_path(self):
+        # For writing a blob before its hash is known; on the store's
+        # filesystem so it can be renamed into place.
+        self.hold()
+        return os.path.join(self.root, f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+    def write(self, dest_path, data, fsync=False):
+        # write_output for the store. Returns whether dest_path changed.
+        self.hold()
+        if isinstance(data, str):
+            data = data.encode()
+        blob = self.path(hash_bytes(data))
+        if not os.path.exists(blob):
+            tmp_path = self.temp_path()
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                if fsync:
+                    os.fsync(f.fileno())
+            self.add(tmp_path, blob, fsync)
+        return self.link(blob, dest_path, fsync)
+
+
+    def commit(self, tmp_path, dest_path, fsync=False):
+        # Moves a finished temp_path() file into the store and links
+        # dest_path to it. Returns whether dest_path changed.
+        self.hold()
+        blob = self.path(hash_file(tmp_path))
+        if os.path.exists(blob):
+            os.remove(tmp_path)
+        else:
+            self.add(tmp_path, blob, fsync)
+        return self.link(blob, dest_path, fsync)
+
+
+    def put_file(self, src_path):
+        # Copies src_path into the store, keeping its mtime, unless the blob
+        # already exists. Returns the blob's path.
+        self.hold()
+        blob = self.path(hash_file(src_path))
+        if not os.path.exists(blob):
+            tmp_path = self.temp_path()
+            shutil.copy2(src_path, tmp_path)
+            self.add(tmp_path, blob)
+        return blob
+
+
+    def add(self, tmp_path, blob, fsync=False):
+        os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        # Another writer (a sync thread, say) may have added the same blob
+        # meanwhile and linked outputs to it; keep that inode rather than
+        # replacing it.
+        try:
+            os.link(tmp_path, blob)
+        except FileExistsError:
+            os.remove(tmp_path)
+        except OSError as e:
+            if e.errno not in LINK_FALLBACK_ERRNOS:
+                os.remove(tmp_path)
+                raise
+            os.replace(tmp_path, blob)
+        else:
+            os.remove(tmp_path)
+        if fsync:
+            fsync_directory(os.path.dirname(blob))
+
+
+    def link(self, blob, dest_path, fsync=False):
+        # Atomically points dest_path at blob. Falls back to a copy where
+        # hardlinks are impossible, e.g. a store on another filesystem.
+        # Returns False if dest_path already was the blob or a copy of it.
+        try:
+            if os.path.samefile(blob, dest_path):
+                return False
+        except OSError:
+            pass
+        tmp_path = temp_path(dest_path)
+        try:
+            os.link(blob, tmp_path)
+        except OSError as e:
+            if e.errno not in LINK_FALLBACK_ERRNOS:
+                raise
+            if os.path.isfile(dest_path) and filecmp.cmp(blob, dest_path, shallow=False):
+                return False
+            shutil.copy2(blob, tmp_path)
+        try:
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        if fsync:
+            fsync_directory(os.path.dirname(dest_path))
+        return True
+
+
+    def prune(self):
+        # Removes blobs no output links to any more, and ends this build's
+        # use of the store. Returns how many, or None if another build is
+        # still using the store: its temp files and blobs not linked yet
+        # would look unreferenced.
+        if not os.path.isdir(self.root):
+            return 0
+        self.hold()
+        try:
+            fcntl.flock(self._lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.release()
+            return None
+        try:
+            return self.remove_unreferenced()
+        finally:
+            self.release()
+
+
+    def remove_unreferenced(self):
+        removed = 0
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if not os.path.isdir(directory):
+                # Temp files of a crashed build.
+                if TEMP_NAME_RE.fullmatch(prefix):
+                    os.remove(directory)
+                continue
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if os.stat(path).st_nlink == 1:
+                    os.remove(path)
+                    removed += 1
+        return removed
@@ -0,0 +1,182 @@
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+from output import temp_path
+from utils import remove_output
+
+SYNC_METHODS = ("copy", "hardlink", "copy_file_range")
+
+# Assets that pages reference and browsers may cache forever once their name
+# carries a hash. Others (robots.txt, favicon.ico, CNAME...) are fetched by
+# fixed names and keep them.
+FINGERPRINT_EXTENSIONS = (".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif",
+                          ".woff", ".woff2", ".ttf", ".otf")
+FINGERPRINT_LENGTH = 8
+# Matches fingerprinted names. Requiring a letter in the hash keeps names like
+# report.20240101.css out; the odd all-digit hash just isn't cached forever.
+FINGERPRINT_RE = re.compile(r"\.(?=[0-9]*[a-f])[0-9a-f]{%d}(\.[^./]+)?$" % FINGERPRINT_LENGTH)
+
+
+def walk_files(root):
+    # Yields (relative path, stat result) for every file under root.
+    stack = [""]
+    while stack:
+        reldir = stack.pop()
+        with os.scandir(os.path.join(root, reldir)) as entries:
+            for entry in entries:
+                relpath = os.path.join(reldir, entry.name)
+                if entry.is_dir():
+                    stack.append(relpath)
+                else:
+                    yield relpath, entry.stat()
+
+
+def is_unchanged(src_path, src_stat, dest_path, check_hash):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if (dest_stat.st_ino, dest_stat.st_dev) == (src_stat.st_ino, src_stat.st_dev):
+        return True
+    if dest_stat.st_size != src_stat.st_size or dest_stat.st_mtime_ns != src_stat.st_mtime_ns:
+        return False
+    return not check_hash or hash_file(src_path) == hash_file(dest_path)
+
+
+def sync_directory(src_dir, dest_dir, previous=None, method="copy", check_hash=False, jobs=8,
+                   fingerprint=False, store=None):
+    # Mirrors src_dir into dest_dir, copying only files whose size or mtime
+    # (and optionally hash) differ and removing files that disappeared since
+    # the previous sync. Returns (assets, changed, removed); assets maps each
+    # relative path to [size, mtime_ns] and is the next call's `previous`.
+    # With fingerprint, assets are copied to content-hashed names and their
+    # entries get the destination as a third item. With store, a BlobStore,
+    # files are linked to their blob instead of copied by method.
+    if method not in SYNC_METHODS:
+        raise ValueError(f"unknown sync method: {method}")
+    print(f"STARTED - sync_directory {src_dir} TO {dest_dir}")
+    previous = previous or {}
+
+    assets = {}
+    changed = []
+    for relpath, src_stat in walk_files(src_dir):
+        src_path = os.path.join(src_dir, relpath)
+        assets[relpath] = [src_stat.st_size, src_stat.st_mtime_ns]
+        if fingerprint and relpath.endswith(FINGERPRINT_EXTENSIONS):
+            old = previous.get(relpath)
+            if not check_hash and old is not None and len(old) > 2 and old[:2] == assets[relpath]:
+                # Same size and mtime: reuse the hash instead of reading the
+                # file, unless mtimes aren't to be trusted.
+                assets[relpath].append(old[2])
+            else:
+                assets[relpath].append(fingerprinted_name(relpath, hash_file(src_path)))
+        dest_path = os.path.join(dest_dir, asset_dest(relpath, assets[relpath]))
+        if store is not None and relpath in previous:
+            # A linked output has the mtime of whichever identical file made
+            # its blob, so trust the source's previous size and mtime.
+            unchanged = (previous[relpath][:2] == assets[relpath][:2] and os.path.exists(dest_path)
+                         and (not check_hash or hash_file(src_path) == hash_file(dest_path)))
+        else:
+            unchanged = is_unchanged(src_path, src_stat, dest_path, check_hash)
+        if not unchanged:
+            changed.append(relpath)
+
+    for directory in sorted({os.path.dirname(relpath) for relpath in changed}):
+        os.makedirs(os.path.join(dest_dir, directory), exist_ok=True)
+    copy = lambda relpath: sync_file(os.path.join(src_dir, relpath),
+                                     os.path.join(dest_dir, asset_dest(relpath, assets[relpath])), method, store)
+    if jobs > 1 and len(changed) > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(copy, changed))
+    else:
+        for relpath in changed:
+            copy(relpath)
+
+    removed = [relpath for relpath in previous if relpath not in assets]
+    current_dests = {asset_dest(relpath, entry) for relpath, entry in assets.items()}
+    for relpath, entry in previous.items():
+        # Also drops the old copy when an asset's fingerprint changed.
+        if asset_dest(relpath, entry) not in current_dests:
+            remove_output(os.path.join(dest_dir, asset_dest(relpath, entry)), dest_dir)
+
+    return assets, changed, removed
+
+
+def asset_dest(relpath, entry):
+    return entry[2] if len(entry) > 2 else relpath
+
+
+def fingerprinted_name(relpath, digest):
+    # images/a.png -> images/a.<hash>.png
+    root, ext = os.path.splitext(relpath)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def asset_urls(assets):
+    # Maps the URL path of each fingerprinted asset (relative to the site
+    # root) to the URL path of its hashed copy.
+    return {relpath.replace(os.sep, "/"): entry[2].replace(os.sep, "/")
+            for relpath, entry in assets.items() if len(entry) > 2}
+
+
+def remove_stale_files(dest_dir, outputs, sidecars=False):
+    # Removes every file under dest_dir that isn't one of outputs (or, with
+    # sidecars, an output's .gz sidecar), so a full build can overwrite the
+    # previous one in place instead of starting from an empty directory.
+    # Returns how many.
+    if not os.path.isdir(dest_dir):
+        return 0
+    keep = {os.path.normpath(path) for path in outputs}
+    if sidecars:
+        keep |= {path + ".gz" for path in keep}
+    stale = sorted(path for path in (os.path.normpath(os.path.join(dest_dir, relpath))
+                                     for relpath, _ in walk_files(dest_dir))
+                   if path not in keep)
+    for path in stale:
+        # remove_output may already have taken it along as a sidecar.
+        if os.path.exists(path):
+            remove_output(path, dest_dir)
+    return len(stale)
+
+
+def sync_file(src_path, dest_path, method="copy", store=None):
+    print(f"COPY - {src_path} TO {dest_path}")
+    if store is not None:
+        store.link(store.put_file(src_path), dest_path)
+        return
+    # Copy next to the destination and rename over it, so a reader never sees
+    # a half-written asset.
+    tmp_path = temp_path(dest_path)
+    try:
+        if method == "hardlink":
+            try:
+                os.link(src_path, tmp_path)
+            except OSError:
+                shutil.copy2(src_path, tmp_path)
+        elif method == "copy_file_range" and hasattr(os, "copy_file_range"):
+            try:
+                copy_file_range(src_path, tmp_path)
+            except OSError:
+                shutil.copy2(src_path, tmp_path)
+        else:
+            # shutil already uses sendfile() on Linux for the data itself.
+            shutil.copy2(src_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def copy_file_range(src_path, dest_path):
+    with open(src_path, "rb") as src, open(dest_path, "wb") as dest:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dest.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+    shutil.copystat(src_path, dest_path)
@@ -0,0 +1,99 @@
+import os
+import re
+import time
+
+from htmlnode import write_html
+from tracing import span
+
+PLACEHOLDER_RE = re.compile(r"\{\{ (\w+) \}\}")
+ROOT_URL_RE = re.compile(r'(href|src)="/')
+ROOT_URL_PATH_RE = re.compile(r'(href|src)="/([^"?#]*)')
+
+_template_cache = {}
+
+
+class Template():
+
+    def __init__(self, text):
+        # Compiled form: a list of (is_placeholder, text) segments.
+        self.segments = []
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            if match.start() > position:
+                self.segments.append((False, text[position:match.start()]))
+            self.segments.append((True, match.group(1)))
+            position = match.end()
+        if position < len(text):
+            self.segments.append((False, text[position:]))
+        self._rebased = {}
+
+
+    def rebased_segments(self, basepath, assets=None):
+        if assets:
+            # Not cached: the asset map changes between builds.
+            return [(is_placeholder, text if is_placeholder else rebase_urls(text, basepath, assets))
+                    for is_placeholder, text in self.segments]
+        segments = self._rebased.get(basepath)
+        if segments is None:
+            segments = []
+            for is_placeholder, text in self.segments:
+                if not is_placeholder:
+                    text = rebase_urls(text, basepath)
+                segments.append((is_placeholder, text))
+            self._rebased[basepath] = segments
+        return segments
+
+
+    def write(self, write, values, basepath='/', assets=None):
+        # Values may be strings or HTML nodes; nodes are serialized straight
+        # into the writer instead of being turned into a string first.
+        # assets maps asset paths to their fingerprinted names.
+        if basepath == '/' and not assets:
+            write_value = write
+        else:
+            write_value = lambda fragment: write(rebase_urls(fragment, basepath, assets))
+        for is_placeholder, text in self.rebased_segments(basepath, assets):
+            if not is_placeholder:
+                write(text)
+            elif text not in values:
+                write_value("{{ " + text + " }}")
+            elif isinstance(values[text], str):
+                write_value(values[text])
+            else:
+                with span("serialize"):
+                    write_html(values[text], write_value)
+
+
+    def render(self, values, basepath='/', assets=None):
+        fragments = []
+        self.write(fragments.append, values, basepath, assets)
+        return "".join(fragments)
+
+
+def rebase_urls(html, basepath, assets=None):
+    # Prefixes root-relative href and src URLs with basepath and points those
+    # found in assets at their fingerprinted names.
+    if '="/' not in html or (basepath == '/' and not assets):
+        return html
+    if not assets:
+        return ROOT_URL_RE.sub(lambda match: f'{match.group(1)}="{basepath}', html)
+    return ROOT_URL_PATH_RE.sub(
+        lambda match: f'{match.group(1)}="{basepath}{assets.get(match.group(2), match.group(2))}', html)
+
+
+def load_template(template_path):
+    # Keyed and trusted like FileHashes, so a template replaced or edited
+    # within one mtime tick isn't served stale by a long-lived daemon: one
+    # modified in the last second is read again every time.
+    stat = os.stat(template_path)
+    key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    cached = _template_cache.get(template_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    loaded_at = time.time_ns()
+
+    with open(template_path, "r") as template_file:
+        template = Template(template_file.read())
+    if stat.st_mtime_ns < loaded_at - 1_000_000_000:
+        _template_cache[template_path] = (key, template)
+    return template
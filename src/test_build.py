@@ -0,0 +1,304 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from build import build_site
+from output import temp_path
+from store import BlobStore, LOCK_NAME
+
+
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class TestBuildSite(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/blog/post/index.md", "# Post\n\nA post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, relpath):
+        return os.path.join(self.root, relpath)
+
+    def write(self, relpath, text):
+        os.makedirs(os.path.dirname(self.path(relpath)), exist_ok=True)
+        with open(self.path(relpath), "w") as f:
+            f.write(text)
+
+    def read(self, relpath):
+        with open(self.path(relpath)) as f:
+            return f.read()
+
+    def outputs(self):
+        docs = self.path("docs")
+        for dirpath, _, filenames in os.walk(docs):
+            for filename in filenames:
+                yield os.path.relpath(os.path.join(dirpath, filename), self.root)
+
+    def build(self, incremental=True, basepath="/", jobs=1, **options):
+        with redirect_stdout(io.StringIO()):
+            return build_site(basepath, incremental=incremental, jobs=jobs, **options,
+                              content_dir=self.path("content"),
+                              template_path=self.path("template.html"),
+                              static_dir=self.path("static"),
+                              dest_dir=self.path("docs"),
+                              state_dir=self.path(".staticsite"))
+
+    def mark_outputs(self):
+        # Overwrite outputs so we can tell which ones were regenerated.
+        self.write("docs/index.html", "stale")
+        self.write("docs/blog/post/index.html", "stale")
+
+    def test_full_build_writes_pages_and_manifest(self):
+        manifest = self.build(incremental=False)
+        self.assertEqual(self.read("docs/index.html"),
+                         "<title>Home</title><article><div><h1>Home</h1><p>Welcome</p></div></article>")
+        self.assertEqual(self.read("docs/index.css"), "body {}")
+        self.assertEqual(len(manifest["pages"]), 2)
+        self.assertTrue(os.path.exists(self.path(".staticsite/manifest.json")))
+
+    def test_parallel_build_matches_serial_build(self):
+        for i in range(6):
+            self.write(f"content/more/page{i}/index.md", f"# Page {i}\n\n" + "A **long** paragraph. " * 50 * i)
+        self.build(incremental=False)
+        serial = {relpath: self.read(relpath) for relpath in self.outputs()}
+        self.build(incremental=False, jobs=3)
+        self.assertEqual({relpath: self.read(relpath) for relpath in self.outputs()}, serial)
+        self.assertEqual(len(serial), 9)
+
+    def test_incremental_build_skips_unchanged_pages(self):
+        self.build()
+        self.mark_outputs()
+        self.write("content/index.md", "# Home\n\nWelcome back")
+        self.build()
+        self.assertIn("Welcome back", self.read("docs/index.html"))
+        self.assertEqual(self.read("docs/blog/post/index.html"), "stale")
+
+    def test_incremental_build_regenerates_missing_outputs(self):
+        self.build()
+        os.remove(self.path("docs/blog/post/index.html"))
+        self.build()
+        self.assertIn("A post", self.read("docs/blog/post/index.html"))
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        self.mark_outputs()
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self.build()
+        self.assertEqual(self.read("docs/index.html"), "<main><div><h1>Home</h1><p>Welcome</p></div></main>")
+        self.assertNotEqual(self.read("docs/blog/post/index.html"), "stale")
+
+    def test_basepath_change_rebuilds_everything(self):
+        self.build()
+        self.mark_outputs()
+        self.build(basepath="/site/")
+        self.assertNotEqual(self.read("docs/index.html"), "stale")
+        self.assertNotEqual(self.read("docs/blog/post/index.html"), "stale")
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.remove(self.path("content/blog/post/index.md"))
+        os.rmdir(self.path("content/blog/post"))
+        self.build()
+        self.assertFalse(os.path.exists(self.path("docs/blog")))
+        self.assertTrue(os.path.exists(self.path("docs/index.html")))
+
+    def test_incremental_build_does_not_wipe_output(self):
+        self.build()
+        self.write("docs/CNAME", "example.com")
+        self.build()
+        self.assertEqual(self.read("docs/CNAME"), "example.com")
+
+    def test_rebuild_leaves_identical_outputs_untouched(self):
+        self.build()
+        os.utime(self.path("docs/index.html"), ns=(0, 0))
+        # Rebuilds every page, but none of them contain root-relative URLs.
+        self.build(basepath="/site/")
+        self.assertEqual(os.stat(self.path("docs/index.html")).st_mtime_ns, 0)
+        self.assertEqual([name for name in self.outputs() if name.endswith(".tmp")], [])
+
+    def test_search_index_updates_incrementally(self):
+        self.build(search=True)
+        # Ids follow the sorted source paths: blog/post/index.md is 0.
+        with open(self.path("docs/search/we.json")) as f:
+            self.assertEqual(json.load(f), {"welcome": [1]})
+        self.write("content/blog/post/index.md", "# Post\n\nWe posted")
+        self.build(search=True, jobs=2)
+        with open(self.path("docs/search/we.json")) as f:
+            self.assertEqual(json.load(f), {"we": [0], "welcome": [1]})
+        with open(self.path("docs/search/index.json")) as f:
+            self.assertEqual(json.load(f)["pages"], [["/blog/post/", "Post"], ["/", "Home"]])
+
+    def test_search_reindexes_pages_skipped_without_it(self):
+        self.build()
+        self.build(search=True)
+        with open(self.path("docs/search/po.json")) as f:
+            self.assertEqual(json.load(f), {"post": [0]})
+
+    def test_gzip_sidecars_follow_their_outputs(self):
+        self.write("content/blog/post/index.md", "# Post\n\n" + "A long post. " * 50)
+        self.build(gzip=True)
+        self.assertTrue(os.path.exists(self.path("docs/blog/post/index.html.gz")))
+        os.remove(self.path("content/blog/post/index.md"))
+        self.build(gzip=True)
+        self.assertFalse(os.path.exists(self.path("docs/blog")))
+
+    def test_output_directory_change_leaves_the_old_one_alone(self):
+        self.build()
+        with redirect_stdout(io.StringIO()):
+            build_site(incremental=True, content_dir=self.path("content"),
+                       template_path=self.path("template.html"), static_dir=self.path("static"),
+                       dest_dir=self.path("other"), state_dir=self.path(".staticsite"))
+        self.write("content/blog/post/index.md", "# Moved\n\nSomewhere else")
+        self.build()
+        self.assertTrue(os.path.exists(self.path("other/blog/post/index.html")))
+        self.assertIn("Moved", self.read("docs/blog/post/index.html"))
+
+    def test_minify_change_rebuilds_everything(self):
+        self.write("content/index.md", "# Home\n\n```\ncode\n```\n\nWelcome   back")
+        self.build()
+        plain = self.read("docs/index.html")
+        self.build(minify=True)
+        self.assertNotEqual(self.read("docs/index.html"), plain)
+        self.build()
+        self.assertEqual(self.read("docs/index.html"), plain)
+
+    def test_parser_change_rebuilds_everything(self):
+        self.build()
+        self.mark_outputs()
+        with mock.patch("build.PARSER_VERSION", -1):
+            self.build()
+        self.assertNotEqual(self.read("docs/index.html"), "stale")
+        self.assertNotEqual(self.read("docs/blog/post/index.html"), "stale")
+
+    def test_fingerprint_change_rewrites_every_page(self):
+        self.write("template.html", '<link href="/index.css" />{{ Content }}')
+        self.build(fingerprint=True)
+        first = self.read("docs/blog/post/index.html")
+        self.assertRegex(first, r'href="/index\.[0-9a-f]{8}\.css"')
+        self.build(fingerprint=True)
+        self.assertEqual(self.read("docs/blog/post/index.html"), first)
+        self.write("static/index.css", "body { color: red }")
+        self.build(fingerprint=True)
+        self.assertNotEqual(self.read("docs/blog/post/index.html"), first)
+
+    def test_asset_change_rerenders_only_pages_that_reference_it(self):
+        self.write("static/images/a.png", "a")
+        self.write("static/images/b.png", "b")
+        self.write("content/index.md", "# Home\n\n![A](/images/a.png)")
+        self.write("content/blog/post/index.md", "# Post\n\n[B](/images/b.png)")
+        manifest = self.build(fingerprint=True)
+        self.assertEqual(manifest["pages"][self.path("content/index.md")]["refs"], ["/images/a.png"])
+        home = self.read("docs/index.html")
+        post = self.read("docs/blog/post/index.html")
+        self.write("static/images/b.png", "bb")
+        self.build(fingerprint=True)
+        self.assertEqual(self.read("docs/index.html"), home)
+        self.assertNotEqual(self.read("docs/blog/post/index.html"), post)
+        self.assertRegex(self.read("docs/blog/post/index.html"), r'href="/images/b\.[0-9a-f]{8}\.png"')
+
+    def test_skipped_pages_keep_their_references(self):
+        self.write("content/index.md", "# Home\n\n[Post](/blog/post/)")
+        self.build()
+        manifest = self.build()
+        self.assertEqual(manifest["pages"][self.path("content/index.md")]["refs"], ["/blog/post/"])
+
+    def test_warns_about_missing_references(self):
+        self.write("content/index.md", "# Home\n\n[Post](/blog/post) ![Gone](/images/gone.png) [Out](https://example.com)")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site(content_dir=self.path("content"), template_path=self.path("template.html"),
+                       static_dir=self.path("static"), dest_dir=self.path("docs"),
+                       state_dir=self.path(".staticsite"))
+        warnings = [line for line in output.getvalue().splitlines() if line.startswith("WARNING")]
+        self.assertEqual(warnings, [f"WARNING - /images/gone.png not found, referenced by {self.path('content/index.md')}"])
+
+    def test_store_links_identical_outputs(self):
+        self.write("content/copy/index.md", "# Home\n\nWelcome")
+        self.write("static/copy.css", "body {}")
+        store = BlobStore(self.path(".staticsite/store"))
+        self.build(incremental=False, store=store)
+        self.assertTrue(os.path.samefile(self.path("docs/index.html"), self.path("docs/copy/index.html")))
+        self.assertTrue(os.path.samefile(self.path("docs/index.css"), self.path("docs/copy.css")))
+        self.assertEqual(self.read("docs/copy.css"), "body {}")
+        self.write("content/copy/index.md", "# Copy\n\nWelcome")
+        self.build(store=store)
+        self.assertEqual(self.read("docs/index.html"),
+                         "<title>Home</title><article><div><h1>Home</h1><p>Welcome</p></div></article>")
+        blobs = [name for _, _, names in os.walk(store.root) for name in names if name != LOCK_NAME]
+        self.assertEqual(len(blobs), 4)
+
+    def test_full_build_overwrites_in_place(self):
+        self.build(incremental=False, fingerprint=True)
+        self.write("docs/stale.html", "left over")
+        os.utime(self.path("docs/index.html"), ns=(0, 0))
+        self.write("content/blog/post/index.md", "# Post\n\nEdited")
+        self.build(incremental=False, fingerprint=True)
+        self.assertEqual(os.stat(self.path("docs/index.html")).st_mtime_ns, 0)
+        self.assertIn("Edited", self.read("docs/blog/post/index.html"))
+        self.assertFalse(os.path.exists(self.path("docs/stale.html")))
+        self.build(incremental=False)
+        self.assertEqual(sorted(self.outputs()),
+                         ["docs/blog/post/index.html", "docs/index.css", "docs/index.html"])
+
+    def test_incremental_build_removes_leftover_temp_files(self):
+        self.build()
+        leftover = temp_path(self.path("docs/blog/post/index.html"))
+        self.write(os.path.relpath(leftover, self.root), "half a page")
+        self.build()
+        self.assertFalse(os.path.exists(leftover))
+
+    def test_search_index_keeps_pages_in_its_directory(self):
+        self.write("content/search/index.md", "# Search\n\nFind things")
+        self.build(search=True)
+        self.build(search=True)
+        self.assertIn("<h1>Search</h1>", self.read("docs/search/index.html"))
+        self.assertTrue(os.path.exists(self.path("docs/search/index.json")))
+
+    def test_unchanged_gzip_search_rebuild_writes_nothing(self):
+        self.write("content/index.md", "# Home\n\n" + "Welcome to a page long enough to compress. " * 20)
+        self.build(search=True, gzip=True)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site(incremental=True, search=True, gzip=True,
+                       content_dir=self.path("content"), template_path=self.path("template.html"),
+                       static_dir=self.path("static"), dest_dir=self.path("docs"),
+                       state_dir=self.path(".staticsite"))
+        written = [line for line in output.getvalue().splitlines()
+                   if line.startswith(("GZIP", "SEARCH", "REMOVING", "COPY"))]
+        self.assertEqual(written, [])
+        self.assertTrue(os.path.exists(self.path("docs/search/search.js.gz")))
+
+    def test_store_skips_unchanged_duplicate_assets(self):
+        self.write("static/a/img.png", "png")
+        self.write("static/b/img.png", "png")
+        os.utime(self.path("static/a/img.png"), ns=(1_000_000_000, 1_000_000_000))
+        store = BlobStore(self.path(".staticsite/store"))
+        self.build(store=store)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site(incremental=True, store=store, content_dir=self.path("content"),
+                       template_path=self.path("template.html"), static_dir=self.path("static"),
+                       dest_dir=self.path("docs"), state_dir=self.path(".staticsite"))
+        self.assertNotIn("COPY", output.getvalue())
+        self.assertTrue(os.path.samefile(self.path("docs/a/img.png"), self.path("docs/b/img.png")))
+
+    def test_turning_on_the_store_links_existing_outputs(self):
+        self.build()
+        self.build(store=BlobStore(self.path(".staticsite/store")))
+        for relpath in self.outputs():
+            self.assertGreater(os.stat(self.path(relpath)).st_nlink, 1, relpath)
+
+
+if __name__ == "__main__":
+    unittest.main()
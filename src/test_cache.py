@@ -0,0 +1,141 @@
+import os
+import tempfile
+import unittest
+
+from cache import DocumentCache, MemoryCache, BlockCache
+from textnode import BlockType
+from utils import render_page, scan_blocks, blocks_to_html, markdown_to_html_node
+
+
+class TestDocumentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = DocumentCache(os.path.join(self.tmp.name, "cache"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_key_depends_on_content(self):
+        self.assertEqual(self.cache.key("# a"), self.cache.key("# a"))
+        self.assertNotEqual(self.cache.key("# a"), self.cache.key("# b"))
+
+    def test_put_and_get(self):
+        key = self.cache.key("# a")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, {"title": "a", "content": "<div></div>"})
+        self.assertEqual(self.cache.get(key), {"title": "a", "content": "<div></div>"})
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = self.cache.key("# a")
+        self.cache.put(key, {})
+        with open(self.cache.path(key), "w") as f:
+            f.write("{trunc")
+        self.assertIsNone(self.cache.get(key))
+
+    def test_prune_evicts_least_recently_used(self):
+        keys = [self.cache.key(f"# {i}") for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, {"content": "x" * 100})
+            os.utime(self.cache.path(key), ns=(i * 10**9, i * 10**9))
+        size = os.path.getsize(self.cache.path(keys[0]))
+        self.cache.max_bytes = size * 2
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertIsNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_get_refreshes_recency(self):
+        old = self.cache.key("# old")
+        new = self.cache.key("# new")
+        self.cache.put(old, {"content": "x" * 100})
+        self.cache.put(new, {"content": "x" * 100})
+        os.utime(self.cache.path(old), ns=(0, 0))
+        os.utime(self.cache.path(new), ns=(10**9, 10**9))
+        self.cache.get(old)
+        self.cache.max_bytes = os.path.getsize(self.cache.path(old))
+        self.cache.prune()
+        self.assertIsNotNone(self.cache.get(old))
+        self.assertIsNone(self.cache.get(new))
+
+    def test_render_page_with_cache_matches_uncached(self):
+        source = self.write("index.md", "# Home\n\n[link](/x) and **bold**")
+        template = self.write("template.html", '<title>{{ Title }}</title><a href="/">{{ Content }}</a>')
+        expected = render_page(source, template, "/base/")
+        self.assertEqual(render_page(source, template, "/base/", self.cache), expected)
+        self.assertEqual(render_page(source, template, "/base/", self.cache), expected)
+
+    def test_render_page_uses_cached_content_without_parsing(self):
+        source = self.write("index.md", "# Home")
+        template = self.write("template.html", "{{ Title }}|{{ Content }}")
+        with open(source) as f:
+            self.cache.put(self.cache.key(f.read()), {"title": "Cached", "content": "<p>cached</p>"})
+        self.assertEqual(render_page(source, template, "/", self.cache), "Cached|<p>cached</p>")
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def test_keys_match_the_document_cache(self):
+        self.assertEqual(MemoryCache().key("# a"), DocumentCache("unused").key("# a"))
+
+    def test_prune_evicts_least_recently_used(self):
+        cache = MemoryCache(max_bytes=10)
+        for name in ("a", "b", "c"):
+            cache.put(name, {"title": name, "content": "x" * 4})
+        cache.get("a")
+        self.assertEqual(cache.prune(), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a")["title"], "a")
+        self.assertEqual(cache.size, 8)
+
+
+class TestBlockCache(unittest.TestCase):
+
+    MARKDOWN = "# Title\n\nFirst **paragraph**\n\n- a\n- [b](/b)\n\n```\ncode\n```\n\nLast paragraph"
+
+    def test_key_depends_on_type_and_text(self):
+        cache = BlockCache()
+        key = cache.key(BlockType.PARAGRAPH, ["a", "b"])
+        self.assertEqual(key, cache.key(BlockType.PARAGRAPH, ["a", "b"]))
+        self.assertNotEqual(key, cache.key(BlockType.QUOTE, ["a", "b"]))
+        self.assertNotEqual(key, cache.key(BlockType.PARAGRAPH, ["a b"]))
+
+    def test_blocks_to_html_matches_tree_serialization(self):
+        expected = markdown_to_html_node(self.MARKDOWN).to_html()
+        self.assertEqual(blocks_to_html(scan_blocks(self.MARKDOWN)), expected)
+        self.assertEqual(blocks_to_html(scan_blocks(self.MARKDOWN), BlockCache()), expected)
+
+    def test_blocks_to_html_without_blocks_raises(self):
+        with self.assertRaises(ValueError):
+            blocks_to_html(scan_blocks("\n\n"), BlockCache())
+
+    def test_editing_one_block_rerenders_only_that_block(self):
+        cache = BlockCache()
+        blocks_to_html(scan_blocks(self.MARKDOWN), cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 5))
+        edited = self.MARKDOWN.replace("First **paragraph**", "First **edited** paragraph")
+        html = blocks_to_html(scan_blocks(edited), cache)
+        self.assertEqual((cache.hits, cache.misses), (4, 6))
+        self.assertEqual(html, markdown_to_html_node(edited).to_html())
+
+    def test_evicts_least_recently_used_blocks(self):
+        cache = BlockCache(max_bytes=20)
+        render = lambda block_type, lines: "x" * 10
+        cache.render(BlockType.PARAGRAPH, ["a"], render)
+        cache.render(BlockType.PARAGRAPH, ["b"], render)
+        cache.render(BlockType.PARAGRAPH, ["a"], render)
+        cache.render(BlockType.PARAGRAPH, ["c"], render)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.size, 20)
+        cache.render(BlockType.PARAGRAPH, ["a"], render)
+        self.assertEqual(cache.hits, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from compress import compress_directory, remove_stale_sidecars
+
+
+class TestCompressDirectory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = self.tmp.name
+        self.write("index.html", "<p>hello</p>" * 100)
+        self.write("blog/index.css", "body {}" * 100)
+        self.write("tiny.html", "<p></p>")
+        self.write("images/a.png", "png" * 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, relpath):
+        return os.path.join(self.dest, relpath)
+
+    def write(self, relpath, text, mtime_ns=None):
+        os.makedirs(os.path.dirname(self.path(relpath)), exist_ok=True)
+        with open(self.path(relpath), "w") as f:
+            f.write(text)
+        if mtime_ns is not None:
+            os.utime(self.path(relpath), ns=(mtime_ns, mtime_ns))
+
+    def compress(self, jobs=1):
+        with redirect_stdout(io.StringIO()):
+            return compress_directory(self.dest, jobs)
+
+    def test_writes_sidecars_for_text_outputs_only(self):
+        self.assertEqual(self.compress(), (2, 0, 0))
+        with gzip.open(self.path("index.html.gz"), "rt") as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 100)
+        self.assertTrue(os.path.exists(self.path("blog/index.css.gz")))
+        self.assertFalse(os.path.exists(self.path("tiny.html.gz")))
+        self.assertFalse(os.path.exists(self.path("images/a.png.gz")))
+        self.assertEqual(os.stat(self.path("index.html.gz")).st_mtime_ns,
+                         os.stat(self.path("index.html")).st_mtime_ns)
+
+    def test_parallel_matches_serial(self):
+        self.compress(jobs=2)
+        with open(self.path("index.html.gz"), "rb") as f:
+            parallel = f.read()
+        os.remove(self.path("index.html.gz"))
+        self.compress()
+        with open(self.path("index.html.gz"), "rb") as f:
+            self.assertEqual(f.read(), parallel)
+
+    def test_skips_unchanged_sources(self):
+        self.compress()
+        self.assertEqual(self.compress(), (0, 2, 0))
+        self.write("index.html", "<p>changed</p>" * 100, mtime_ns=10**9)
+        self.assertEqual(self.compress(), (1, 1, 0))
+        with gzip.open(self.path("index.html.gz"), "rt") as f:
+            self.assertEqual(f.read(), "<p>changed</p>" * 100)
+
+    def test_removes_sidecars_of_files_that_shrank(self):
+        self.compress()
+        self.write("index.html", "<p></p>")
+        self.assertEqual(self.compress(), (0, 1, 1))
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+
+    def test_leaves_unrelated_gz_files_alone(self):
+        self.write("archive.tar.gz", "not a sidecar")
+        self.compress()
+        remove_stale_sidecars(self.dest)
+        self.assertTrue(os.path.exists(self.path("archive.tar.gz")))
+
+    def test_remove_stale_sidecars(self):
+        self.compress()
+        self.write("index.html", "<p>changed</p>" * 100, mtime_ns=10**9)
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(remove_stale_sidecars(self.dest), 1)
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+        self.assertTrue(os.path.exists(self.path("blog/index.css.gz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import io
+import os
+import socketserver
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+
+from client import main as client_main, send_request, parse_args, DEFAULT_SOCKET
+from daemon import BuildDaemon, DaemonHandler, ReplyWriter
+
+
+class TestBuildDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/post/index.md", "# Post\n\nA post")
+        self.daemon = BuildDaemon()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, relpath, text):
+        os.makedirs(os.path.dirname(relpath) or ".", exist_ok=True)
+        with open(relpath, "w") as f:
+            f.write(text)
+
+    def run_build(self, argv, **request):
+        out = io.StringIO()
+        status = self.daemon.run({"argv": argv, "cwd": os.getcwd(), **request}, out)
+        return status, out.getvalue()
+
+    def test_builds_with_warm_cache(self):
+        status, output = self.run_build(["/"])
+        self.assertEqual(status, 0)
+        self.assertIn("Generating page from content/index.md", output)
+        self.assertEqual(len(self.daemon.cache), 2)
+        with open("docs/post/index.html") as f:
+            self.assertEqual(f.read(), "<title>Post</title><div><h1>Post</h1><p>A post</p></div>")
+
+    def test_incremental_build_renders_only_the_changed_page(self):
+        self.run_build(["/", "--incremental"])
+        self.write("content/post/index.md", "# Post\n\nEdited")
+        status, output = self.run_build(["/", "--incremental"], changed=["content/post/index.md"])
+        self.assertEqual(status, 0)
+        self.assertIn("SKIP - content/index.md unchanged", output)
+        self.assertIn("Generating page from content/post/index.md", output)
+
+    def test_reports_errors_as_exit_status(self):
+        status, output = self.run_build(["--bogus"])
+        self.assertEqual(status, 2)
+        self.assertIn("unrecognized arguments", output)
+        os.remove("template.html")
+        status, output = self.run_build(["/"])
+        self.assertEqual(status, 1)
+        self.assertIn("FileNotFoundError", output)
+
+    def test_rejects_other_directories_and_commands(self):
+        self.assertEqual(self.daemon.run({"argv": [], "cwd": self.cwd}, io.StringIO()), 1)
+        self.assertEqual(self.run_build(["serve"])[0], 1)
+
+
+class TestDaemonSocket(unittest.TestCase):
+
+    def test_client_round_trip(self):
+        with tempfile.TemporaryDirectory() as root:
+            socket_path = os.path.join(root, "daemon.sock")
+            server = socketserver.UnixStreamServer(socket_path, DaemonHandler)
+            server.builder = BuildDaemon()
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                out = io.StringIO()
+                with redirect_stdout(io.StringIO()):
+                    # A different directory: the daemon answers without building.
+                    self.assertEqual(send_request({"argv": [], "cwd": root}, socket_path, out), 1)
+                    self.assertEqual(send_request({"stop": True}, socket_path, io.StringIO()), 0)
+                    thread.join(timeout=5)
+                self.assertIn("ERROR - this daemon builds", out.getvalue())
+                self.assertFalse(thread.is_alive())
+            finally:
+                server.server_close()
+
+    def test_client_fallback_returns_the_build_status(self):
+        with tempfile.TemporaryDirectory() as root:
+            argv = ["--socket", os.path.join(root, "daemon.sock"),
+                    "merge", "--out", os.path.join(root, "docs"), os.path.join(root, "missing")]
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                self.assertEqual(client_main(argv), 1)
+
+    def test_reply_writer_survives_a_closed_client(self):
+        class Closed(io.BytesIO):
+            def write(self, data):
+                raise BrokenPipeError()
+        writer = ReplyWriter(Closed())
+        self.assertEqual(writer.write("text"), 4)
+        writer.flush()
+        self.assertTrue(writer.closed)
+
+
+class TestClientArgs(unittest.TestCase):
+
+    def test_separates_client_options_from_build_arguments(self):
+        self.assertEqual(parse_args(["/site/", "--incremental", "--socket", "s.sock", "--changed=content/a.md"]),
+                         ("s.sock", [os.path.join("content", "a.md")], False, ["/site/", "--incremental"]))
+        self.assertEqual(parse_args(["--stop"]), (DEFAULT_SOCKET, [], True, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+from contextlib import redirect_stdout
+from http.server import ThreadingHTTPServer
+
+from devserver import DevSite, DevRequestHandler, inject_reload_script, RELOAD_SCRIPT
+
+
+class TestDevSite(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("template.html", "<body>{{ Content }}</body>")
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post/index.md", "# Post")
+        self.site = DevSite(self.path("content"), self.path("static"), self.path("template.html"))
+        with redirect_stdout(io.StringIO()):
+            self.site.build()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, relpath):
+        return os.path.join(self.root, relpath)
+
+    def write(self, relpath, text, mtime_ns=None):
+        os.makedirs(os.path.dirname(self.path(relpath)), exist_ok=True)
+        with open(self.path(relpath), "w") as f:
+            f.write(text)
+        if mtime_ns is not None:
+            os.utime(self.path(relpath), ns=(mtime_ns, mtime_ns))
+
+    def poll(self):
+        with redirect_stdout(io.StringIO()):
+            return self.site.poll()
+
+    def test_build_renders_every_page_into_memory(self):
+        self.assertEqual(sorted(self.site.pages), ["/blog/post/index.html", "/index.html"])
+        self.assertEqual(self.site.pages["/index.html"],
+                         f"<body><div><h1>Home</h1></div>{RELOAD_SCRIPT}</body>".encode())
+
+    def test_poll_without_changes(self):
+        self.assertFalse(self.poll())
+
+    def test_poll_rerenders_only_the_changed_page(self):
+        post = self.site.pages["/blog/post/index.html"]
+        self.write("content/index.md", "# Home again", mtime_ns=1)
+        version = self.site.version
+        self.assertTrue(self.poll())
+        self.assertIn(b"Home again", self.site.pages["/index.html"])
+        self.assertIs(self.site.pages["/blog/post/index.html"], post)
+        self.assertEqual(self.site.version, version + 1)
+
+    def test_poll_rerenders_everything_when_template_changes(self):
+        self.write("template.html", "<main>{{ Content }}</main>", mtime_ns=1)
+        self.poll()
+        for page in self.site.pages.values():
+            self.assertTrue(page.startswith(b"<main>"))
+
+    def test_poll_adds_and_removes_pages(self):
+        self.write("content/new/index.md", "# New")
+        os.remove(self.path("content/blog/post/index.md"))
+        self.poll()
+        self.assertEqual(sorted(self.site.pages), ["/index.html", "/new/index.html"])
+
+    def test_poll_keeps_the_last_good_render_on_errors(self):
+        self.write("content/index.md", "no title here", mtime_ns=1)
+        self.poll()
+        self.assertIn(b"<h1>Home</h1>", self.site.pages["/index.html"])
+
+    def test_poll_survives_a_template_saved_by_rename(self):
+        os.rename(self.path("template.html"), self.path("template.html.swp"))
+        self.assertFalse(self.poll())
+        self.write("template.html", "<main>{{ Content }}</main>", mtime_ns=1)
+        self.assertTrue(self.poll())
+        self.assertTrue(self.site.pages["/index.html"].startswith(b"<main>"))
+
+    def test_lookup(self):
+        self.assertEqual(self.site.lookup("/")[0], self.site.pages["/index.html"])
+        self.assertEqual(self.site.lookup("/blog/post")[0], self.site.pages["/blog/post/index.html"])
+        self.assertEqual(self.site.lookup("/index.css"), (None, os.path.abspath(self.path("static/index.css"))))
+        self.assertEqual(self.site.lookup("/../template.html"), (None, None))
+        self.assertEqual(self.site.lookup("/missing"), (None, None))
+
+    def test_lookup_strips_basepath(self):
+        self.site.basepath = "/site/"
+        self.assertEqual(self.site.lookup("/site/blog/post/")[0], self.site.pages["/blog/post/index.html"])
+
+    def test_serves_pages_over_http(self):
+        handler = type("Handler", (DevRequestHandler,), {"site": self.site, "log_message": lambda *args: None})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(url + "/blog/post") as response:
+                self.assertIn(b"<h1>Post</h1>", response.read())
+            with urllib.request.urlopen(url + "/index.css") as response:
+                self.assertEqual(response.read(), b"body {}")
+                self.assertEqual(response.headers["Content-Type"], "text/css")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestInjectReloadScript(unittest.TestCase):
+
+    def test_injects_before_closing_body(self):
+        self.assertEqual(inject_reload_script("<body>x</body></html>"),
+                         f"<body>x{RELOAD_SCRIPT}</body></html>")
+
+    def test_appends_without_body(self):
+        self.assertEqual(inject_reload_script("<p>x</p>"), f"<p>x</p>{RELOAD_SCRIPT}")
+
+
+if __name__ == "__main__":
+    unittest.main()
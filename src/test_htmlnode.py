@@ -1,6 +1,9 @@
+import io
 import unittest
 
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, write_html, escape_text, escape_attribute
+from leafnode import LeafNode
+from parentnode import ParentNode
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -33,6 +36,45 @@ class TestHTMLNode(unittest.TestCase):
         expected = 'prop1="value1" prop2="value2"' 
         self.assertEqual(node.props_to_html(), expected)
 
+    def test_escaping_returns_plain_strings_unchanged(self):
+        text = "nothing special, 'quoted' \"too\""
+        self.assertIs(escape_text(text), text)
+        self.assertEqual(escape_attribute(text), "nothing special, 'quoted' &quot;too&quot;")
+        self.assertEqual(escape_text("&amp; <b>"), "&amp;amp; &lt;b>")
+
+    def test_to_html_not_implemented_on_base_node(self):
+        with self.assertRaises(NotImplementedError):
+            HTMLNode("p", "simple content").to_html()
+
+
+class TestWriteHTML(unittest.TestCase):
+
+    def test_write_html_emits_fragments_in_order(self):
+        node = ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")], {"class": "x"})
+        fragments = []
+        write_html(node, fragments.append)
+        self.assertEqual(fragments, ['<p class="x">', "<b>bold</b>", " text", "</p>"])
+
+    def test_write_html_to_file_like_object(self):
+        node = ParentNode("div", [ParentNode("span", [LeafNode("i", "deep")])])
+        out = io.StringIO()
+        write_html(node, out.write)
+        self.assertEqual(out.getvalue(), node.to_html())
+        self.assertEqual(out.getvalue(), "<div><span><i>deep</i></span></div>")
+
+    def test_deeply_nested_tree_does_not_hit_recursion_limit(self):
+        node = LeafNode("b", "core")
+        for _ in range(20000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 20000 + "<b>core</b>"))
+        self.assertTrue(html.endswith("</span>" * 20000))
+
+    def test_write_html_validates_children(self):
+        node = ParentNode("div", [ParentNode("p", [])])
+        with self.assertRaises(ValueError):
+            write_html(node, [].append)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -34,5 +34,17 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(node.to_html(), result)
 
 
+    def test_leaf_to_html_escapes_text(self):
+        node = LeafNode("code", 'if a < b && c > "d"')
+        self.assertEqual(node.to_html(), '<code>if a &lt; b &amp;&amp; c > "d"</code>')
+        self.assertEqual(LeafNode(None, "< Back Home").to_html(), "&lt; Back Home")
+
+
+    def test_leaf_to_html_escapes_attributes(self):
+        node = LeafNode("img", "x", {"src": "/a.png?w=1&h=2", "alt": 'say "hi" <now>'})
+        self.assertEqual(node.to_html(),
+                         '<img src="/a.png?w=1&amp;h=2" alt="say &quot;hi&quot; <now>">x</img>')
+
+
 if __name__ == "__main__":
     unittest.main()
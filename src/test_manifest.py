@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from manifest import hash_bytes, hash_file, FileHashes
+from manifest import new_manifest, load_manifest, save_manifest, MANIFEST_VERSION
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manifest_path = os.path.join(self.tmp.name, "state", "manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_file_matches_hash_bytes(self):
+        path = os.path.join(self.tmp.name, "file.md")
+        with open(path, "wb") as f:
+            f.write(b"# Title")
+        self.assertEqual(hash_file(path), hash_bytes(b"# Title"))
+
+    def test_round_trip(self):
+        manifest = new_manifest("abc", "/")
+        manifest["pages"]["content/index.md"] = {"hash": "123", "dest": "docs/index.html"}
+        save_manifest(self.manifest_path, manifest)
+        self.assertEqual(load_manifest(self.manifest_path), manifest)
+
+    def test_missing_manifest_loads_as_none(self):
+        self.assertIsNone(load_manifest(self.manifest_path))
+
+    def test_corrupt_manifest_loads_as_none(self):
+        os.makedirs(os.path.dirname(self.manifest_path))
+        with open(self.manifest_path, "w") as f:
+            f.write("{not json")
+        self.assertIsNone(load_manifest(self.manifest_path))
+
+    def test_outdated_manifest_loads_as_none(self):
+        manifest = new_manifest("abc", "/")
+        manifest["version"] = MANIFEST_VERSION + 1
+        save_manifest(self.manifest_path, manifest)
+        self.assertIsNone(load_manifest(self.manifest_path))
+
+
+class TestFileHashes(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "page.md")
+        with open(self.path, "w") as f:
+            f.write("# a")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def age(self, seconds):
+        mtime = os.stat(self.path).st_mtime - seconds
+        os.utime(self.path, (mtime, mtime))
+
+    def test_reuses_hash_of_unchanged_old_file(self):
+        hashes = FileHashes()
+        self.age(10)
+        first = hashes.hash(self.path)
+        stat = os.stat(self.path)
+        with open(self.path, "w") as f:
+            f.write("# b")
+        # Same size and mtime: the stored hash is trusted.
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(hashes.hash(self.path), first)
+        hashes.forget(self.path)
+        self.assertEqual(hashes.hash(self.path), hash_bytes(b"# b"))
+
+    def test_rehashes_recently_modified_file(self):
+        hashes = FileHashes()
+        self.assertEqual(hashes.hash(self.path), hash_bytes(b"# a"))
+        with open(self.path, "w") as f:
+            f.write("# b")
+        self.assertEqual(hashes.hash(self.path), hash_bytes(b"# b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
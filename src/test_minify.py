@@ -0,0 +1,80 @@
+import os
+import random
+import tempfile
+import unittest
+
+from minify import Minifier, minify, minify_tag
+from utils import render_page
+
+
+class TestMinify(unittest.TestCase):
+
+    def test_collapses_whitespace_between_inline_content(self):
+        self.assertEqual(minify("<p>a  \n\t b <b>bold</b>  <i>x</i> c</p>"),
+                         "<p>a b <b>bold</b> <i>x</i> c</p>")
+
+    def test_drops_whitespace_next_to_block_tags(self):
+        html = "<!doctype html>\n<html>\n  <head>\n    <title> T </title>\n  </head>\n  <body>\n    <p> x </p>\n  </body>\n</html>\n"
+        self.assertEqual(minify(html),
+                         "<!doctype html><html><head><title>T</title></head><body><p>x</p></body></html>")
+
+    def test_keeps_non_breaking_spaces(self):
+        self.assertEqual(minify("<p>a\xa0 b</p>"), "<p>a\xa0 b</p>")
+
+    def test_preserves_raw_text_elements(self):
+        html = '<div>\n<pre><code>\n  a  <b>\n</code></pre>\n<textarea>  x  </textarea><script>if (a  <b) {}</script></div>'
+        self.assertEqual(minify(html),
+                         '<div><pre><code>\n  a  <b>\n</code></pre><textarea>  x  </textarea>'
+                         '<script>if (a  <b) {}</script></div>')
+
+    def test_lone_angle_bracket_is_text(self):
+        self.assertEqual(minify('<a href="/">< Back Home</a>'), '<a href="/">< Back Home</a>')
+
+    def test_keeps_comments(self):
+        self.assertEqual(minify("<p>a</p>\n<!-- <b>  x </b> -->\n<p>b</p>"),
+                         "<p>a</p><!-- <b>  x </b> --><p>b</p>")
+
+    def test_comments_are_transparent_to_whitespace(self):
+        self.assertEqual(minify("<p>a <!-- c --> b</p>"), "<p>a<!-- c --> b</p>")
+        self.assertEqual(minify("<p>a<!-- c --> b</p>"), "<p>a<!-- c --> b</p>")
+        self.assertEqual(minify("<p>a <!-- c -->b</p>"), "<p>a<!-- c --> b</p>")
+        self.assertEqual(minify("<div> <!-- c --> <p>x</p></div>"), "<div><!-- c --><p>x</p></div>")
+
+    def test_minify_tag_unquotes_safe_values(self):
+        self.assertEqual(minify_tag('<link  href="/index.css"\n  rel="stylesheet" />'),
+                         '<link href=/index.css rel=stylesheet />')
+        self.assertEqual(minify_tag('<img src="a.png" alt="two words" title="">'),
+                         '<img src=a.png alt="two words" title="">')
+        self.assertEqual(minify_tag('<img src="a.png"/>'), '<img src="a.png"/>')
+        self.assertEqual(minify_tag('<a href="/blog/" data-x="a=b" >'), '<a href="/blog/" data-x="a=b">')
+
+    def test_fragment_boundaries_do_not_matter(self):
+        html = ('<!doctype html>\n<html>\n<head><meta charset="utf-8" /><!-- a > b -->\n<title>A  b</title></head>\n'
+                '<body>\n  <p>Some <b>bold</b> text</p>\n<PRE>\n  keep   this\n</PRE>\n<p>< x</p>\n</body></html>')
+        expected = minify(html)
+        for seed in range(200):
+            rng = random.Random(seed)
+            fragments = []
+            minifier = Minifier(fragments.append)
+            position = 0
+            while position < len(html):
+                size = rng.randint(1, 12)
+                minifier.write(html[position:position + size])
+                position += size
+            minifier.close()
+            self.assertEqual("".join(fragments), expected)
+
+    def test_render_page_minifies_the_fragment_stream(self):
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "index.md")
+            template = os.path.join(root, "template.html")
+            with open(source, "w") as f:
+                f.write("# Title\n\nSome **bold** text\n\n```\n  code  \n```")
+            with open(template, "w") as f:
+                f.write('<html>\n  <head><title>{{ Title }}</title></head>\n  <body>\n    {{ Content }}\n  </body>\n</html>')
+            self.assertEqual(render_page(source, template, minify=True),
+                             minify(render_page(source, template)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from output import write_output, AtomicOutput, temp_path, remove_temp_files
+
+
+class TestOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.dest) as f:
+            return f.read()
+
+    def leftovers(self):
+        return [name for name in os.listdir(self.tmp.name) if name.endswith(".tmp")]
+
+    def test_write_output_creates_and_replaces(self):
+        self.assertTrue(write_output(self.dest, "<p>one</p>"))
+        self.assertEqual(self.read(), "<p>one</p>")
+        self.assertTrue(write_output(self.dest, b"<p>two</p>", fsync=True))
+        self.assertEqual(self.read(), "<p>two</p>")
+        self.assertEqual(self.leftovers(), [])
+
+    def test_write_output_skips_identical_bytes(self):
+        write_output(self.dest, "<p>same</p>")
+        os.utime(self.dest, ns=(0, 0))
+        self.assertFalse(write_output(self.dest, "<p>same</p>"))
+        self.assertEqual(os.stat(self.dest).st_mtime_ns, 0)
+
+    def test_atomic_output_keeps_old_file_on_error(self):
+        write_output(self.dest, "<p>old</p>")
+        with self.assertRaises(RuntimeError):
+            with AtomicOutput(self.dest) as f:
+                f.write("<p>half")
+                raise RuntimeError("crash")
+        self.assertEqual(self.read(), "<p>old</p>")
+        self.assertEqual(self.leftovers(), [])
+
+    def test_atomic_output_compares_with_existing_file(self):
+        write_output(self.dest, "<p>same</p>")
+        output = AtomicOutput(self.dest)
+        with output as f:
+            f.write("<p>same</p>")
+        self.assertFalse(output.changed)
+        output = AtomicOutput(self.dest)
+        with output as f:
+            f.write("<p>new</p>")
+        self.assertTrue(output.changed)
+        self.assertEqual(self.read(), "<p>new</p>")
+        self.assertEqual(self.leftovers(), [])
+
+    def test_remove_temp_files_left_by_a_crash(self):
+        os.makedirs(os.path.join(self.tmp.name, "blog"))
+        leftover = temp_path(os.path.join(self.tmp.name, "blog", "index.html"))
+        for path in (leftover, self.dest, os.path.join(self.tmp.name, "notes.tmp")):
+            with open(path, "w") as f:
+                f.write("x")
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(remove_temp_files(self.tmp.name), 1)
+        self.assertFalse(os.path.exists(leftover))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["blog", "index.html", "notes.tmp"])
+
+
+if __name__ == "__main__":
+    unittest.main()
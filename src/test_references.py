@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from references import ref_path, reference_index, template_refs, changed_assets, missing_refs
+
+
+class TestReferences(unittest.TestCase):
+
+    def test_ref_path(self):
+        self.assertEqual(ref_path("/images/a.png"), "images/a.png")
+        self.assertEqual(ref_path("/blog/post/?page=2#top"), "blog/post/")
+        self.assertEqual(ref_path("/"), "")
+        self.assertIsNone(ref_path("https://example.com/a.png"))
+        self.assertIsNone(ref_path("//cdn.example.com/a.png"))
+        self.assertIsNone(ref_path("images/a.png"))
+
+    def test_reference_index_maps_paths_to_pages(self):
+        pages = {
+            "content/b.md": {"refs": ["/images/a.png", "https://example.com"]},
+            "content/a.md": {"refs": ["/images/a.png#x", "/blog/"]},
+            "content/c.md": {},
+        }
+        self.assertEqual(reference_index(pages), {
+            "images/a.png": ["content/a.md", "content/b.md"],
+            "blog/": ["content/a.md"],
+        })
+
+    def test_template_refs_ignore_placeholders(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as f:
+                f.write('<link href="/index.css" /><img src="/logo.png?v=1" /><a href="https://x">{{ Content }}</a>')
+            self.assertEqual(template_refs(path), {"index.css", "logo.png"})
+
+    def test_changed_assets(self):
+        old = {"a.css": "a.1111111a.css", "b.css": "b.2222222b.css", "c.css": "c.3333333c.css"}
+        new = {"a.css": "a.1111111a.css", "b.css": "b.4444444b.css", "d.css": "d.5555555d.css"}
+        self.assertEqual(changed_assets(old, new), {"b.css", "c.css", "d.css"})
+
+    def test_missing_refs_accepts_assets_and_page_urls(self):
+        index = {"images/a.png": ["x.md"], "blog/post": ["x.md"], "blog/post/": ["x.md"], "": ["y.md"],
+                 "blog/post/index.html": ["x.md"], "missing": ["x.md", "y.md"]}
+        assets = {os.path.join("images", "a.png"): [1, 2]}
+        page_dests = ["docs/index.html", "docs/blog/post/index.html"]
+        self.assertEqual(list(missing_refs(index, assets, page_dests, "docs")), [("missing", ["x.md", "y.md"])])
+
+
+if __name__ == "__main__":
+    unittest.main()
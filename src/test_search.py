@@ -0,0 +1,127 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from search import SearchIndex, tokenize, shard_name, delta_encode, delta_decode, page_url
+from utils import render_page, stream_page
+
+
+class TestSearchHelpers(unittest.TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The **Lord** of the Rings, vol. 2"),
+                         ["the", "lord", "of", "the", "rings", "vol", "2"])
+        self.assertEqual(tokenize("Éowyn's"), ["éowyn", "s"])
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("rings"), "ri")
+        self.assertEqual(shard_name("a"), "a")
+        self.assertEqual(shard_name("éowyn"), "_" + "éo".encode().hex())
+        self.assertEqual(shard_name("_x"), "_" + b"_x".hex())
+
+    def test_delta_round_trip(self):
+        self.assertEqual(delta_encode([3, 4, 10]), [3, 1, 6])
+        self.assertEqual(delta_decode([3, 1, 6]), [3, 4, 10])
+
+    def test_page_url(self):
+        self.assertEqual(page_url("docs/index.html", "docs"), "/")
+        self.assertEqual(page_url("docs/blog/tom/index.html", "docs", "/site/"), "/site/blog/tom/")
+        self.assertEqual(page_url("docs/about.html", "docs"), "/about.html")
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out_dir = os.path.join(self.tmp.name, "search")
+        self.index = self.new_index()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def new_index(self):
+        index = SearchIndex(os.path.join(self.tmp.name, "state", "search.json"))
+        index.load()
+        return index
+
+    def write(self):
+        with redirect_stdout(io.StringIO()):
+            return self.index.write(self.out_dir)
+
+    def read(self, name):
+        with open(os.path.join(self.out_dir, name)) as f:
+            return json.load(f)
+
+    def test_postings_are_delta_encoded_by_shard(self):
+        self.index.update("a.md", "h1", "/a/", "A", ["ring", "tom"])
+        self.index.update("b.md", "h2", "/b/", "B", ["ring"])
+        self.write()
+        self.assertEqual(self.read("ri.json"), {"ring": [0, 1]})
+        self.assertEqual(self.read("to.json"), {"tom": [0]})
+        self.assertEqual(self.read("index.json")["pages"], [["/a/", "A"], ["/b/", "B"]])
+        self.assertEqual(self.read("index.json")["shards"], ["ri", "to"])
+
+    def test_ids_are_stable_across_loads(self):
+        self.index.update("a.md", "h1", "/a/", "A", ["x"])
+        self.index.update("b.md", "h2", "/b/", "B", ["x"])
+        self.index.save()
+        self.index = self.new_index()
+        self.assertTrue(self.index.is_current("b.md", "h2"))
+        self.assertFalse(self.index.is_current("b.md", "changed"))
+        self.index.retain({"b.md"})
+        self.index.update("c.md", "h3", "/c/", "C", ["y"])
+        self.assertEqual(self.index.pages["b.md"]["id"], 1)
+        self.assertEqual(self.index.pages["c.md"]["id"], 2)
+
+    def test_incremental_write_only_touches_changed_shards(self):
+        self.index.update("a.md", "h1", "/a/", "A", ["ring", "tom"])
+        self.assertEqual(self.write(), 4)
+        self.index.update("a.md", "h2", "/a/", "A", ["ring", "tolkien"])
+        self.assertEqual(self.write(), 1)
+        self.assertEqual(self.read("to.json"), {"tolkien": [0]})
+
+    def test_removes_stale_shards(self):
+        self.index.update("a.md", "h1", "/a/", "A", ["ring"])
+        self.write()
+        self.index.retain(set())
+        self.write()
+        self.assertEqual(sorted(os.listdir(self.out_dir)), ["index.json", "search.js"])
+
+    def test_removes_stale_shards_recorded_in_the_state(self):
+        self.index.update("a.md", "h1", "/a/", "A", ["ring"])
+        self.write()
+        self.index.save()
+        for name in ("index.html", "index.html.gz", "ri.json.gz"):
+            with open(os.path.join(self.out_dir, name), "w") as f:
+                f.write("not the index's")
+        self.index = self.new_index()
+        self.index.retain(set())
+        self.write()
+        self.assertEqual(sorted(os.listdir(self.out_dir)),
+                         ["index.html", "index.html.gz", "index.json", "search.js"])
+
+
+class TestPageText(unittest.TestCase):
+
+    def test_render_and_stream_collect_the_same_terms(self):
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "index.md")
+            template = os.path.join(root, "template.html")
+            with open(source, "w") as f:
+                f.write("# The Title\n\nSome **bold** [link](/x)\n\n- item\n\n```\ncode\n```")
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            rendered = {}
+            render_page(source, template, page_text=rendered)
+            streamed = {}
+            stream_page(source, template, os.path.join(root, "index.html"), page_text=streamed)
+        self.assertEqual(rendered, {"title": "The Title",
+                                    "terms": ["bold", "item", "link", "some", "the", "title"]})
+        self.assertEqual(streamed, rendered)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import asyncio
+import gzip
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+from email.utils import formatdate
+
+from server import StaticSite, start_server, parse_range, accepts_gzip, RangeNotSatisfiable
+
+
+class TestHelpers(unittest.TestCase):
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=50-500", 100), (50, 99))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(parse_range("items=0-1", 100))
+        self.assertIsNone(parse_range("bytes=9-1", 100))
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range("bytes=100-", 100)
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(accepts_gzip("*"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip("br"))
+        self.assertFalse(accepts_gzip(None))
+
+
+class TestStaticServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("index.html", b"<h1>Home</h1>")
+        self.write("blog/post/index.html", b"<h1>Post</h1>" * 100)
+        self.write("big.bin", bytes(range(256)) * 64)
+        with open(self.path("blog/post/index.html"), "rb") as f:
+            self.write("blog/post/index.html.gz", gzip.compress(f.read(), mtime=0))
+        stat = os.stat(self.path("blog/post/index.html"))
+        os.utime(self.path("blog/post/index.html.gz"), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        self.site = StaticSite(self.root, cache_file_bytes=1024)
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(start_server(self.site, "127.0.0.1", 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.connections = []
+
+    def tearDown(self):
+        # Closed connections let their handlers finish before the loop stops.
+        for connection in self.connections:
+            connection.close()
+        asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.tmp.cleanup()
+
+    async def shutdown(self):
+        self.server.close()
+        await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}), return_exceptions=True)
+
+    def path(self, relpath):
+        return os.path.join(self.root, relpath)
+
+    def write(self, relpath, data):
+        os.makedirs(os.path.dirname(self.path(relpath)), exist_ok=True)
+        with open(self.path(relpath), "wb") as f:
+            f.write(data)
+
+    def request(self, path, headers=None, method="GET", connection=None):
+        if connection is None:
+            connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+            self.connections.append(connection)
+        connection.request(method, path, headers=headers or {})
+        response = connection.getresponse()
+        return response, response.read()
+
+    def test_serves_index_pages_with_validators(self):
+        response, body = self.request("/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"<h1>Home</h1>")
+        self.assertEqual(response.headers["Content-Type"], "text/html; charset=utf-8")
+        self.assertIsNotNone(response.headers["ETag"])
+        self.assertIsNotNone(response.headers["Last-Modified"])
+
+    def test_redirects_directories_and_rejects_traversal(self):
+        response, _ = self.request("/blog/post?x=1")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.headers["Location"], "/blog/post/?x=1")
+        self.assertEqual(self.request("/../etc/passwd")[0].status, 404)
+        self.assertEqual(self.request("/missing.html")[0].status, 404)
+        self.assertEqual(self.request("/", method="POST")[0].status, 405)
+
+    def test_conditional_requests(self):
+        response, _ = self.request("/index.html")
+        etag = response.headers["ETag"]
+        response, body = self.request("/index.html", {"If-None-Match": etag})
+        self.assertEqual((response.status, body), (304, b""))
+        response, _ = self.request("/index.html", {"If-None-Match": '"other"'})
+        self.assertEqual(response.status, 200)
+        response, _ = self.request("/index.html", {"If-Modified-Since": formatdate(usegmt=True)})
+        self.assertEqual(response.status, 304)
+        response, _ = self.request("/index.html", {"If-Modified-Since": formatdate(0, usegmt=True)})
+        self.assertEqual(response.status, 200)
+
+    def test_negotiates_gzip_sidecars(self):
+        response, body = self.request("/blog/post/", {"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body), b"<h1>Post</h1>" * 100)
+        response, body = self.request("/blog/post/")
+        self.assertIsNone(response.headers["Content-Encoding"])
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(body, b"<h1>Post</h1>" * 100)
+
+    def test_ignores_stale_sidecars(self):
+        os.utime(self.path("blog/post/index.html.gz"), ns=(0, 0))
+        response, body = self.request("/blog/post/", {"Accept-Encoding": "gzip"})
+        self.assertIsNone(response.headers["Content-Encoding"])
+        self.assertEqual(body, b"<h1>Post</h1>" * 100)
+
+    def test_range_requests_from_memory_and_disk(self):
+        data = bytes(range(256)) * 64
+        for path, expected in (("/index.html", b"<h1>Home</h1>"), ("/big.bin", data)):
+            response, body = self.request(path, {"Range": "bytes=2-5"})
+            self.assertEqual(response.status, 206)
+            self.assertEqual(body, expected[2:6])
+            self.assertEqual(response.headers["Content-Range"], f"bytes 2-5/{len(expected)}")
+            response, body = self.request(path, {"Range": "bytes=-3"})
+            self.assertEqual(body, expected[-3:])
+        response, _ = self.request("/big.bin", {"Range": f"bytes={len(data)}-"})
+        self.assertEqual(response.status, 416)
+        self.assertEqual(response.headers["Content-Range"], f"bytes */{len(data)}")
+        response, body = self.request("/big.bin", {"Range": "bytes=0-1", "If-Range": '"stale"'})
+        self.assertEqual((response.status, body), (200, data))
+
+    def test_head_and_keep_alive(self):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        try:
+            response, body = self.request("/big.bin", method="HEAD", connection=connection)
+            self.assertEqual((response.status, body), (200, b""))
+            self.assertEqual(response.headers["Content-Length"], str(256 * 64))
+            response, body = self.request("/big.bin", connection=connection)
+            self.assertEqual(len(body), 256 * 64)
+            response, body = self.request("/", connection=connection)
+            self.assertEqual(body, b"<h1>Home</h1>")
+        finally:
+            connection.close()
+
+    def test_cache_picks_up_rebuilt_files(self):
+        self.request("/")
+        self.write("index.html.tmp", b"<h1>Rebuilt</h1>")
+        os.replace(self.path("index.html.tmp"), self.path("index.html"))
+        self.assertEqual(self.request("/")[1], b"<h1>Rebuilt</h1>")
+
+    def test_fingerprinted_assets_are_immutable(self):
+        self.write("index.0123abcd.css", b"body {}")
+        self.assertEqual(self.request("/index.0123abcd.css")[0].headers["Cache-Control"],
+                         "public, max-age=31536000, immutable")
+        self.assertEqual(self.request("/")[0].headers["Cache-Control"], "no-cache")
+
+    def test_basepath(self):
+        self.site.basepath = "/site/"
+        self.assertEqual(self.request("/site/")[1], b"<h1>Home</h1>")
+        self.assertEqual(self.request("/")[0].status, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
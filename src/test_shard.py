@@ -0,0 +1,152 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from build import build_site
+from shard import parse_shard, shard_of, select_shard, merge_shards, MergeConflict, SHARD_MANIFEST
+
+
+class TestShardSelection(unittest.TestCase):
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/3"), (2, 3))
+        for text in ("0/3", "4/3", "1/0", "3", "a/b"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_shards_partition_the_pages(self):
+        pages = [(os.path.join("content", f"page{i}", "index.md"), os.path.join("docs", f"page{i}", "index.html"))
+                 for i in range(50)]
+        selected = [select_shard(pages, "content", (index, 4)) for index in range(1, 5)]
+        self.assertEqual(sorted(page for shard in selected for page in shard), sorted(pages))
+        self.assertTrue(all(selected))
+
+    def test_shard_of_is_stable(self):
+        # Changing the assignment would move pages between machines mid-rollout.
+        self.assertEqual([shard_of(f"page{i}/index.md", 3) for i in range(6)],
+                         [shard_of(f"page{i}/index.md", 3) for i in range(6)])
+        self.assertEqual(shard_of("blog/post/index.md", 1), 1)
+        self.assertEqual(shard_of(os.path.join("blog", "post", "index.md"), 5), shard_of("blog/post/index.md", 5))
+
+
+class TestMergeShards(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("template.html", '<link href="/index.css" /><title>{{ Title }}</title>{{ Content }}')
+        self.write("static/index.css", "body {}")
+        for i in range(8):
+            self.write(f"content/page{i}/index.md", f"# Page {i}\n\n[Next](/page{(i + 1) % 8}/)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, relpath):
+        return os.path.join(self.root, relpath)
+
+    def write(self, relpath, text):
+        os.makedirs(os.path.dirname(self.path(relpath)), exist_ok=True)
+        with open(self.path(relpath), "w") as f:
+            f.write(text)
+
+    def build(self, out, basepath="/", state=None, **options):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            build_site(basepath, content_dir=self.path("content"), template_path=self.path("template.html"),
+                       static_dir=self.path("static"), dest_dir=self.path(out),
+                       state_dir=self.path(state or ".state-" + out), **options)
+        return output.getvalue()
+
+    def build_shards(self, count, **options):
+        outputs = [self.build(f"shard{index}", shard=(index, count), **options) for index in range(1, count + 1)]
+        return [self.path(f"shard{index}") for index in range(1, count + 1)], outputs
+
+    def merge(self, shard_dirs):
+        with redirect_stdout(io.StringIO()):
+            return merge_shards(shard_dirs, self.path("docs"))
+
+    def tree(self, relpath):
+        files = {}
+        for dirpath, _, filenames in os.walk(self.path(relpath)):
+            for filename in filenames:
+                with open(os.path.join(dirpath, filename)) as f:
+                    files[os.path.relpath(os.path.join(dirpath, filename), self.path(relpath))] = f.read()
+        return files
+
+    def test_merged_shards_match_a_full_build(self):
+        shard_dirs, outputs = self.build_shards(3, fingerprint=True)
+        # Links to pages of other shards aren't reported as missing.
+        self.assertFalse([line for output in outputs for line in output.splitlines() if "WARNING" in line])
+        self.assertEqual(self.merge(shard_dirs), 9)
+        self.build("full", fingerprint=True)
+        self.assertEqual(self.tree("docs"), self.tree("full"))
+
+    def test_incremental_shards_sharing_state_keep_each_others_outputs(self):
+        for _ in range(2):
+            outputs = [self.build(f"shard{index}", state=".state", shard=(index, 2), incremental=True)
+                       for index in (1, 2)]
+        for output in outputs:
+            self.assertNotIn("REMOVING", output)
+            self.assertNotIn("Generating page", output)
+        pages = [relpath for index in (1, 2) for relpath in self.tree(f"shard{index}")
+                 if relpath.endswith("index.html")]
+        self.assertEqual(len(pages), 8)
+        self.assertGreater(len(self.tree("shard1")), 2)
+        self.assertGreater(len(self.tree("shard2")), 2)
+
+    def test_shard_manifest_lists_pages_and_files(self):
+        shard_dirs, _ = self.build_shards(2)
+        with open(os.path.join(shard_dirs[0], SHARD_MANIFEST)) as f:
+            shard_manifest = json.load(f)
+        self.assertEqual(shard_manifest["shard"], [1, 2])
+        self.assertIn("index.css", shard_manifest["files"])
+        for page, dest in shard_manifest["pages"].items():
+            self.assertIn(dest, shard_manifest["files"])
+
+    def test_incomplete_or_repeated_shards_conflict(self):
+        shard_dirs, _ = self.build_shards(3)
+        with self.assertRaisesRegex(MergeConflict, "missing shards 3 of 3"):
+            self.merge(shard_dirs[:2])
+        with self.assertRaisesRegex(MergeConflict, "also in"):
+            self.merge(shard_dirs + shard_dirs[:1])
+        self.assertFalse(os.path.exists(self.path("docs")))
+
+    def test_disagreeing_files_conflict(self):
+        shard_dirs, _ = self.build_shards(2)
+        self.write("static/index.css", "body { color: red }")
+        self.build("shard2", shard=(2, 2))
+        with self.assertRaisesRegex(MergeConflict, "index.css: differs between"):
+            self.merge(shard_dirs)
+
+    def test_files_changed_after_the_build_conflict(self):
+        shard_dirs, _ = self.build_shards(2)
+        with open(os.path.join(shard_dirs[1], "index.css"), "a") as f:
+            f.write("tampered")
+        with self.assertRaisesRegex(MergeConflict, "index.css: changed in"):
+            self.merge(shard_dirs)
+
+    def test_shards_of_different_builds_conflict(self):
+        self.build("shard1", shard=(1, 2))
+        self.build("shard2", "/site/", shard=(2, 2))
+        with self.assertRaisesRegex(MergeConflict, "basepath differs"):
+            self.merge([self.path("shard1"), self.path("shard2")])
+
+    def test_shards_with_different_options_conflict(self):
+        self.build("shard1", shard=(1, 2), minify=True, fingerprint=True)
+        self.build("shard2", shard=(2, 2))
+        with self.assertRaisesRegex(MergeConflict, "minify differs") as context:
+            self.merge([self.path("shard1"), self.path("shard2")])
+        self.assertIn("fingerprint differs", str(context.exception))
+        self.assertFalse(os.path.exists(self.path("docs")))
+
+    def test_search_needs_every_page(self):
+        with self.assertRaises(ValueError):
+            self.build("shard1", shard=(1, 2), search=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
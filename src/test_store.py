@@ -0,0 +1,132 @@
+import errno
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+from output import write_output, AtomicOutput
+from store import BlobStore, LOCK_NAME
+
+
+class TestBlobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BlobStore(os.path.join(self.tmp.name, "store"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def read(self, name):
+        with open(self.path(name)) as f:
+            return f.read()
+
+    def blobs(self):
+        return [os.path.join(dirpath, name) for dirpath, _, names in os.walk(self.store.root)
+                for name in names if name != LOCK_NAME]
+
+    def test_identical_outputs_share_one_blob(self):
+        self.assertTrue(self.store.write(self.path("a.html"), "<p>same</p>"))
+        self.assertTrue(write_output(self.path("b.html"), b"<p>same</p>", store=self.store))
+        self.assertTrue(os.path.samefile(self.path("a.html"), self.path("b.html")))
+        self.assertEqual(len(self.blobs()), 1)
+        self.assertEqual(os.stat(self.path("a.html")).st_nlink, 3)
+
+    def test_unchanged_write_leaves_output_alone(self):
+        self.store.write(self.path("a.html"), "<p>same</p>")
+        self.assertFalse(self.store.write(self.path("a.html"), "<p>same</p>"))
+
+    def test_changed_write_relinks_output(self):
+        self.store.write(self.path("a.html"), "<p>old</p>")
+        self.store.write(self.path("b.html"), "<p>old</p>")
+        self.assertTrue(self.store.write(self.path("a.html"), "<p>new</p>"))
+        self.assertEqual(self.read("a.html"), "<p>new</p>")
+        self.assertEqual(self.read("b.html"), "<p>old</p>")
+        self.assertEqual(len(self.blobs()), 2)
+
+    def test_blobs_are_read_only(self):
+        self.store.write(self.path("a.html"), "<p>one</p>")
+        self.assertEqual(os.stat(self.blobs()[0]).st_mode & 0o777, 0o444)
+
+    def test_copies_when_hardlinks_are_impossible(self):
+        with mock.patch("os.link", side_effect=OSError(errno.EXDEV, "cross-device link")):
+            self.assertTrue(self.store.write(self.path("a.html"), "<p>one</p>"))
+            self.assertFalse(self.store.write(self.path("a.html"), "<p>one</p>"))
+        self.assertEqual(self.read("a.html"), "<p>one</p>")
+        self.assertFalse(os.path.samefile(self.path("a.html"), self.blobs()[0]))
+
+    def test_other_link_errors_propagate(self):
+        with mock.patch("os.link", side_effect=OSError(errno.EIO, "I/O error")):
+            with self.assertRaises(OSError):
+                self.store.write(self.path("a.html"), "<p>one</p>")
+        self.assertFalse(os.path.exists(self.path("a.html")))
+
+    def test_atomic_output_commits_into_store(self):
+        self.store.write(self.path("a.html"), "<p>streamed</p>")
+        output = AtomicOutput(self.path("b.html"), store=self.store)
+        with output as f:
+            f.write("<p>streamed</p>")
+        self.assertTrue(output.changed)
+        self.assertTrue(os.path.samefile(self.path("a.html"), self.path("b.html")))
+        output = AtomicOutput(self.path("b.html"), store=self.store)
+        with output as f:
+            f.write("<p>streamed</p>")
+        self.assertFalse(output.changed)
+        self.assertEqual(len(self.blobs()), 1)
+
+    def test_put_file_keeps_mtime(self):
+        with open(self.path("style.css"), "w") as f:
+            f.write("body {}")
+        os.utime(self.path("style.css"), ns=(0, 0))
+        blob = self.store.put_file(self.path("style.css"))
+        self.assertEqual(os.stat(blob).st_mtime_ns, 0)
+        self.assertEqual(self.store.put_file(self.path("style.css")), blob)
+
+    def test_prune_removes_unlinked_blobs(self):
+        self.store.write(self.path("a.html"), "<p>kept</p>")
+        self.store.write(self.path("b.html"), "<p>dropped</p>")
+        os.remove(self.path("b.html"))
+        self.assertEqual(self.store.prune(), 1)
+        self.assertEqual(len(self.blobs()), 1)
+        self.assertTrue(os.path.samefile(self.path("a.html"), self.blobs()[0]))
+
+    def test_prune_removes_leftover_temp_files(self):
+        self.store.write(self.path("a.html"), "<p>kept</p>")
+        with open(self.store.temp_path(), "w") as f:
+            f.write("half a blob")
+        self.store.prune()
+        self.assertEqual(len(self.blobs()), 1)
+
+    def test_prune_waits_for_other_builds_sharing_the_store(self):
+        other = BlobStore(self.store.root)
+        other.hold()
+        # As if from another process.
+        in_flight = os.path.join(self.store.root, ".99999.1.tmp")
+        with open(in_flight, "w") as f:
+            f.write("half a blob")
+        self.store.write(self.path("a.html"), "<p>one</p>")
+        os.remove(self.path("a.html"))
+        self.assertIsNone(self.store.prune())
+        self.assertTrue(os.path.exists(in_flight))
+        self.assertEqual(len(self.blobs()), 2)
+        other.release()
+        self.assertEqual(self.store.prune(), 1)
+        self.assertEqual(self.blobs(), [])
+
+    def test_copies_for_workers_take_their_own_lock(self):
+        self.store.write(self.path("a.html"), "<p>one</p>")
+        copy = pickle.loads(pickle.dumps(self.store))
+        self.assertEqual(copy.root, self.store.root)
+        copy.write(self.path("b.html"), "<p>one</p>")
+        self.assertTrue(os.path.samefile(self.path("a.html"), self.path("b.html")))
+
+    def test_prune_of_missing_store(self):
+        self.assertEqual(self.store.prune(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
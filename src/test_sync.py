@@ -0,0 +1,146 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from sync import sync_directory, walk_files, asset_urls, FINGERPRINT_RE
+
+
+class TestSyncDirectory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.write(self.src, "index.css", "body {}")
+        self.write(self.src, "images/a.png", "png-a")
+        self.write(self.src, "images/b.png", "png-b")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, root, relpath, text):
+        path = os.path.join(root, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, relpath):
+        with open(os.path.join(self.dest, relpath)) as f:
+            return f.read()
+
+    def sync(self, previous=None, **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return sync_directory(self.src, self.dest, previous, **kwargs)
+
+    def test_walk_files_lists_nested_files(self):
+        relpaths = sorted(relpath for relpath, _ in walk_files(self.src))
+        self.assertEqual(relpaths, ["images/a.png", "images/b.png", "index.css"])
+
+    def test_first_sync_copies_everything(self):
+        assets, changed, removed = self.sync()
+        self.assertEqual(sorted(changed), ["images/a.png", "images/b.png", "index.css"])
+        self.assertEqual(removed, [])
+        self.assertEqual(self.read("images/a.png"), "png-a")
+        self.assertEqual(assets["index.css"][0], len("body {}"))
+
+    def test_second_sync_copies_only_changed_files(self):
+        assets, _, _ = self.sync()
+        self.write(self.src, "index.css", "body { color: red }")
+        _, changed, _ = self.sync(assets)
+        self.assertEqual(changed, ["index.css"])
+        self.assertEqual(self.read("index.css"), "body { color: red }")
+
+    def test_copies_keep_source_mtime(self):
+        self.sync()
+        src_stat = os.stat(os.path.join(self.src, "index.css"))
+        dest_stat = os.stat(os.path.join(self.dest, "index.css"))
+        self.assertEqual(src_stat.st_mtime_ns, dest_stat.st_mtime_ns)
+
+    def test_check_hash_catches_same_size_and_mtime(self):
+        self.sync()
+        dest_path = os.path.join(self.dest, "index.css")
+        stat = os.stat(dest_path)
+        self.write(self.dest, "index.css", "XXXX {}")
+        os.utime(dest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        _, changed, _ = self.sync()
+        self.assertEqual(changed, [])
+        _, changed, _ = self.sync(check_hash=True)
+        self.assertEqual(changed, ["index.css"])
+        self.assertEqual(self.read("index.css"), "body {}")
+
+    def test_removed_sources_are_deleted(self):
+        assets, _, _ = self.sync()
+        self.write(self.dest, "index.html", "a generated page")
+        os.remove(os.path.join(self.src, "images/a.png"))
+        os.remove(os.path.join(self.src, "images/b.png"))
+        _, _, removed = self.sync(assets)
+        self.assertEqual(sorted(removed), ["images/a.png", "images/b.png"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertEqual(self.read("index.html"), "a generated page")
+
+    def test_hardlink_method_shares_the_inode(self):
+        _, changed, _ = self.sync(method="hardlink")
+        self.assertEqual(len(changed), 3)
+        self.assertTrue(os.path.samefile(os.path.join(self.src, "index.css"),
+                                         os.path.join(self.dest, "index.css")))
+        _, changed, _ = self.sync(method="hardlink")
+        self.assertEqual(changed, [])
+
+    def test_copy_file_range_method(self):
+        self.sync(method="copy_file_range")
+        self.assertEqual(self.read("images/b.png"), "png-b")
+
+    def test_fingerprint_copies_to_hashed_names(self):
+        self.write(self.src, "robots.txt", "User-agent: *")
+        assets, _, _ = self.sync(fingerprint=True)
+        urls = asset_urls(assets)
+        self.assertEqual(sorted(urls), ["images/a.png", "images/b.png", "index.css"])
+        self.assertRegex(urls["index.css"], r"^index\.[0-9a-f]{8}\.css$")
+        self.assertEqual(self.read(urls["index.css"]), "body {}")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.css")))
+        self.assertEqual(self.read("robots.txt"), "User-agent: *")
+
+    def test_fingerprint_changes_with_content_and_drops_old_copy(self):
+        assets, _, _ = self.sync(fingerprint=True)
+        old_name = asset_urls(assets)["index.css"]
+        _, changed, _ = self.sync(assets, fingerprint=True)
+        self.assertEqual(changed, [])
+        self.write(self.src, "index.css", "body { color: red }")
+        assets, changed, _ = self.sync(assets, fingerprint=True)
+        self.assertEqual(changed, ["index.css"])
+        self.assertNotEqual(asset_urls(assets)["index.css"], old_name)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, old_name)))
+
+    def test_check_hash_rehashes_fingerprinted_assets(self):
+        assets, _, _ = self.sync(fingerprint=True, check_hash=True)
+        old_name = asset_urls(assets)["index.css"]
+        path = os.path.join(self.src, "index.css")
+        stat = os.stat(path)
+        self.write(self.src, "index.css", "body{ }")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assets, changed, _ = self.sync(assets, fingerprint=True, check_hash=True)
+        self.assertEqual(changed, ["index.css"])
+        self.assertNotEqual(asset_urls(assets)["index.css"], old_name)
+        self.assertEqual(self.read(asset_urls(assets)["index.css"]), "body{ }")
+
+    def test_turning_fingerprints_off_restores_plain_names(self):
+        assets, _, _ = self.sync(fingerprint=True)
+        old_name = asset_urls(assets)["index.css"]
+        self.sync(assets)
+        self.assertEqual(self.read("index.css"), "body {}")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, old_name)))
+
+    def test_fingerprint_re(self):
+        self.assertTrue(FINGERPRINT_RE.search("index.0123abcd.css"))
+        self.assertFalse(FINGERPRINT_RE.search("index.css"))
+        self.assertFalse(FINGERPRINT_RE.search("report.20240101.css"))
+
+    def test_unknown_method_raises(self):
+        with self.assertRaises(ValueError):
+            self.sync(method="rsync")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import time
+import unittest
+
+from leafnode import LeafNode
+from parentnode import ParentNode
+from template import Template, load_template, rebase_urls
+
+
+class TestTemplate(unittest.TestCase):
+
+    def test_compiles_into_literal_and_placeholder_segments(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        self.assertEqual(template.segments, [
+            (False, "<title>"),
+            (True, "Title"),
+            (False, "</title>"),
+            (True, "Content"),
+        ])
+
+    def test_render_fills_placeholders(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        html = template.render({"Title": "Hi", "Content": "<p>body</p>"})
+        self.assertEqual(html, "<title>Hi</title><article><p>body</p></article>")
+
+    def test_render_repeated_placeholder(self):
+        template = Template("{{ Title }} and {{ Title }}")
+        self.assertEqual(template.render({"Title": "x"}), "x and x")
+
+    def test_render_leaves_unknown_placeholders(self):
+        template = Template("{{ Title }} {{ Footer }}")
+        self.assertEqual(template.render({"Title": "x"}), "x {{ Footer }}")
+
+    def test_render_rebases_template_and_content_urls(self):
+        template = Template('<link href="/index.css" /><article>{{ Content }}</article>')
+        html = template.render({"Content": '<a href="/blog">b</a><img src="/a.png" alt="a">'}, "/site/")
+        self.assertEqual(
+            html,
+            '<link href="/site/index.css" /><article><a href="/site/blog">b</a><img src="/site/a.png" alt="a"></article>',
+        )
+
+    def test_render_matches_chained_replace(self):
+        text = '<title>{{ Title }}</title><link href="/x.css" />{{ Content }}'
+        values = {"Title": "T", "Content": '<a href="/p">p</a><a href="https://e.com">e</a>'}
+        expected = text.replace("{{ Title }}", values["Title"])
+        expected = expected.replace("{{ Content }}", values["Content"])
+        expected = expected.replace('href="/', 'href="/base/').replace('src="/', 'src="/base/')
+        self.assertEqual(Template(text).render(values, "/base/"), expected)
+
+    def test_render_serializes_node_values(self):
+        template = Template("<article>{{ Content }}</article>")
+        node = ParentNode("p", [LeafNode("a", "home", {"href": "/"}), LeafNode(None, " text")])
+        self.assertEqual(template.render({"Content": node}, "/site/"),
+                         '<article><p><a href="/site/">home</a> text</p></article>')
+
+    def test_write_streams_into_a_writer(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        fragments = []
+        template.write(fragments.append, {"Title": "T", "Content": ParentNode("p", [LeafNode(None, "x")])})
+        self.assertEqual(fragments, ["<title>", "T", "</title>", "<p>", "x", "</p>"])
+
+    def test_rebase_urls_is_noop_for_root(self):
+        self.assertEqual(rebase_urls('<a href="/x">', "/"), '<a href="/x">')
+
+    def test_rebase_urls_rewrites_fingerprinted_assets(self):
+        assets = {"index.css": "index.0123abcd.css", "images/a.png": "images/a.89ab4567.png"}
+        html = '<link href="/index.css?v=1" /><img src="/images/a.png"><a href="/images/">i</a>'
+        self.assertEqual(rebase_urls(html, "/", assets),
+                         '<link href="/index.0123abcd.css?v=1" /><img src="/images/a.89ab4567.png"><a href="/images/">i</a>')
+        self.assertEqual(rebase_urls(html, "/site/", assets),
+                         '<link href="/site/index.0123abcd.css?v=1" /><img src="/site/images/a.89ab4567.png">'
+                         '<a href="/site/images/">i</a>')
+
+    def test_render_rewrites_assets_in_template_and_nodes(self):
+        template = Template('<link href="/index.css" />{{ Content }}')
+        node = ParentNode("p", [LeafNode("img", "a", {"src": "/a.png", "alt": "a"})])
+        assets = {"index.css": "index.0123abcd.css", "a.png": "a.89ab4567.png"}
+        self.assertEqual(template.render({"Content": node}, "/", assets),
+                         '<link href="/index.0123abcd.css" /><p><img src="/a.89ab4567.png" alt="a">a</img></p>')
+        # The cached rebased segments are unaffected.
+        self.assertEqual(template.render({"Content": "x"}), '<link href="/index.css" />x')
+
+
+class TestLoadTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "template.html")
+        self.write("<p>{{ Content }}</p>", 1_000_000_000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text, mtime_ns):
+        with open(self.path, "w") as f:
+            f.write(text)
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_load_template_is_cached(self):
+        self.assertIs(load_template(self.path), load_template(self.path))
+
+    def test_load_template_reloads_when_mtime_changes(self):
+        first = load_template(self.path)
+        self.write("<div>{{ Content }}</div>", 2_000_000_000)
+        second = load_template(self.path)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.render({"Content": "x"}), "<div>x</div>")
+
+    def test_load_template_reloads_a_replaced_file_with_the_same_mtime(self):
+        first = load_template(self.path)
+        replacement = self.path + ".new"
+        with open(replacement, "w") as f:
+            f.write("<b>{{ Content }}</b>")
+        os.utime(replacement, ns=(1_000_000_000, 1_000_000_000))
+        os.replace(replacement, self.path)
+        second = load_template(self.path)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.render({"Content": "x"}), "<b>x</b>")
+
+    def test_load_template_rereads_a_recently_modified_file(self):
+        now = time.time_ns()
+        self.write("<p>{{ Content }}</p>", now)
+        first = load_template(self.path)
+        self.write("<b>{{ Content }}</b>", now)
+        second = load_template(self.path)
+        self.assertEqual(second.render({"Content": "x"}), "<b>x</b>")
+        self.assertIsNot(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
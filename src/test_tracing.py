@@ -0,0 +1,101 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from tracing import span, enable_tracing, disable_tracing, tracing_enabled
+from tracing import drain_events, add_events, write_trace, slowest_pages
+from utils import generate_page, generate_pages
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        disable_tracing()
+
+    def tearDown(self):
+        disable_tracing()
+
+    def test_span_is_a_noop_when_disabled(self):
+        with span("read"):
+            pass
+        self.assertFalse(tracing_enabled())
+        self.assertEqual(drain_events(), [])
+
+    def test_span_records_complete_events(self):
+        enable_tracing()
+        with span("read", path="a.md"):
+            pass
+        [event] = drain_events()
+        self.assertEqual(event["name"], "read")
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["args"], {"path": "a.md"})
+        self.assertEqual(event["pid"], os.getpid())
+        self.assertGreaterEqual(event["dur"], 0)
+
+    def test_drain_and_add_events(self):
+        enable_tracing()
+        with span("write"):
+            pass
+        events = drain_events()
+        self.assertEqual(drain_events(), [])
+        add_events(events)
+        self.assertEqual(len(drain_events()), 1)
+
+    def test_slowest_pages_attributes_nested_spans(self):
+        enable_tracing()
+        add_events([
+            {"name": "page", "ph": "X", "ts": 0, "dur": 1000, "pid": 1, "tid": 1, "args": {"path": "fast.md"}},
+            {"name": "read", "ph": "X", "ts": 0, "dur": 400, "pid": 1, "tid": 1, "args": {}},
+            {"name": "page", "ph": "X", "ts": 2000, "dur": 5000, "pid": 1, "tid": 1, "args": {"path": "slow.md"}},
+            {"name": "parse_inline", "ph": "X", "ts": 2500, "dur": 3000, "pid": 1, "tid": 1, "args": {}},
+            {"name": "walk", "ph": "X", "ts": 8000, "dur": 10, "pid": 1, "tid": 1, "args": {}},
+        ])
+        self.assertEqual(slowest_pages(2), [
+            ("slow.md", 5.0, {"parse_inline": 3.0}),
+            ("fast.md", 1.0, {"read": 0.4}),
+        ])
+
+    def test_generate_page_trace_written_as_chrome_json(self):
+        enable_tracing()
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "index.md")
+            template = os.path.join(root, "template.html")
+            with open(source, "w") as f:
+                f.write("# Title\n\nSome **text**")
+            with open(template, "w") as f:
+                f.write("{{ Title }}{{ Content }}")
+            with redirect_stdout(io.StringIO()):
+                generate_page(source, template, os.path.join(root, "out", "index.html"))
+
+            trace_path = os.path.join(root, "trace.json")
+            write_trace(trace_path)
+            with open(trace_path) as f:
+                names = {event["name"] for event in json.load(f)["traceEvents"]}
+        self.assertEqual(names, {"page", "read", "parse_blocks", "parse_inline", "template", "serialize", "write"})
+
+    def test_parallel_trace_has_each_span_once(self):
+        enable_tracing()
+        with span("walk"):
+            pass
+        with tempfile.TemporaryDirectory() as root:
+            template = os.path.join(root, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Title }}{{ Content }}")
+            pages = []
+            for i in range(4):
+                source = os.path.join(root, f"page{i}.md")
+                with open(source, "w") as f:
+                    f.write(f"# Page {i}\n\nSome **text**")
+                pages.append((source, os.path.join(root, "out", f"page{i}.html")))
+            with redirect_stdout(io.StringIO()):
+                generate_pages(pages, template, jobs=3)
+        names = [event["name"] for event in drain_events()]
+        self.assertEqual(names.count("walk"), 1)
+        self.assertEqual(names.count("page"), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,9 @@
+import io
+import os
+import tempfile
+import tracemalloc
 import unittest
+from contextlib import redirect_stdout
 
 from textnode import TextType, TextNode, BlockType
 from utils import text_node_to_html_node, split_nodes_delimiter
@@ -7,8 +12,10 @@ from utils import split_nodes_link, split_nodes_image
 from utils import text_to_textnodes
 from utils import markdown_to_blocks
 from utils import block_to_block_type
+from utils import scan_blocks
 from utils import markdown_to_html_node
 from utils import extract_title
+from utils import render_page, stream_page, generate_page
 
 
 class TestUtils(unittest.TestCase):
@@ -335,6 +342,41 @@ class TestUtils(unittest.TestCase):
         ]
         self.assertEqual(text_to_textnodes(input), expected)
 
+    def test_for_text_to_textnodes_plain_text_fast_path(self):
+        input = "Nothing special here, not even an exclamation mark!"
+        self.assertEqual(text_to_textnodes(input), [TextNode(input, TextType.TEXT)])
+
+    def test_for_text_to_textnodes_with_adjacent_images_and_links(self):
+        input = "![a](a.png)[b](/b)![c](c.png) tail"
+        expected = [
+            TextNode("a", TextType.IMAGE, "a.png"),
+            TextNode("b", TextType.LINK, "/b"),
+            TextNode("c", TextType.IMAGE, "c.png"),
+            TextNode(" tail", TextType.TEXT),
+        ]
+        self.assertEqual(text_to_textnodes(input), expected)
+
+    def test_for_text_to_textnodes_with_many_links(self):
+        input = "".join(f"see [link {i}](/page/{i}) and " for i in range(500))
+        nodes = text_to_textnodes(input)
+        self.assertEqual(len(nodes), 1001)
+        self.assertEqual(nodes[-2], TextNode("link 499", TextType.LINK, "/page/499"))
+        self.assertEqual(nodes[-1], TextNode(" and ", TextType.TEXT))
+
+    def test_for_text_to_textnodes_delimiters_do_not_nest(self):
+        input = "**bold with _underscores_ and `ticks` inside** and `code`"
+        expected = [
+            TextNode("bold with _underscores_ and `ticks` inside", TextType.BOLD),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("code", TextType.CODE),
+        ]
+        self.assertEqual(text_to_textnodes(input), expected)
+
+    def test_for_text_to_textnodes_with_unclosed_delimiter(self):
+        with self.assertRaises(ValueError) as context:
+            text_to_textnodes("an [ok](/link) then **unclosed bold")
+        self.assertEqual(str(context.exception), "invalid markdown, formatted section not closed")
+
 
     ### test for markdown_to_blocks
 
@@ -456,6 +498,46 @@ This is the same paragraph on a new line
         input = "1. first ol list item\nthis is not a valid item"
         self.assertEqual(block_to_block_type(input), BlockType.PARAGRAPH)
 
+    def test_block_to_block_type_with_non_numeric_ordered_list_item(self):
+        input = "1. first ol list item\nb. not a number"
+        self.assertEqual(block_to_block_type(input), BlockType.PARAGRAPH)
+
+    def test_block_to_block_type_with_heading_marker_on_its_own_line(self):
+        input = "#\nnot a heading"
+        self.assertEqual(block_to_block_type(input), BlockType.PARAGRAPH)
+
+    ### test for scan_blocks
+
+    def test_scan_blocks_yields_typed_lines(self):
+        md = """
+# Title
+
+Some text
+on two lines
+
+- one
+- two
+
+1. first
+2. second
+"""
+        self.assertEqual(list(scan_blocks(md)), [
+            (BlockType.HEADING, ["# Title"]),
+            (BlockType.PARAGRAPH, ["Some text", "on two lines"]),
+            (BlockType.UNORDERED_LIST, ["- one", "- two"]),
+            (BlockType.ORDERED_LIST, ["1. first", "2. second"]),
+        ])
+
+    def test_scan_blocks_trims_like_markdown_to_blocks(self):
+        md = "  first block  \n\n\n   \n\n\n \n second\nblock \n\n"
+        blocks = ["\n".join(lines) for _, lines in scan_blocks(md)]
+        self.assertEqual(blocks, markdown_to_blocks(md))
+        self.assertEqual(blocks, ["first block", "second\nblock"])
+
+    def test_scan_blocks_with_empty_input(self):
+        self.assertEqual(list(scan_blocks("")), [])
+        self.assertEqual(list(scan_blocks("\n\n  \n")), [])
+
     ###
 
     def test_paragraphs(self):
@@ -561,5 +643,81 @@ the **same** even with inline stuff
 
 
 
+class TestStreamPage(unittest.TestCase):
+
+    MARKDOWN = "Intro **first**\n\n# The *Title*\n\n- [a](/a)\n- b\n\n```\ncode\n```\n\n> ![img](/i.png)\n"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = self.write("index.md", self.MARKDOWN)
+        self.template = self.write("template.html", '<title>{{ Title }}</title><a href="/">{{ Content }}</a>{{ Other }}')
+        self.dest = os.path.join(self.tmp.name, "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def read_dest(self):
+        with open(self.dest) as f:
+            return f.read()
+
+    def test_matches_render_page(self):
+        for basepath in ("/", "/site/"):
+            stream_page(self.source, self.template, self.dest, basepath)
+            self.assertEqual(self.read_dest(), render_page(self.source, self.template, basepath))
+
+    def test_escapes_the_title_like_render_page(self):
+        source = self.write("index.md", "# Fish & <Chips>\n\nText")
+        stream_page(source, self.template, self.dest)
+        self.assertIn("<title>Fish &amp; &lt;Chips></title>", self.read_dest())
+        self.assertEqual(self.read_dest(), render_page(source, self.template))
+
+    def test_title_after_content(self):
+        template = self.write("template.html", "{{ Content }}<footer>{{ Title }}</footer>")
+        stream_page(self.source, template, self.dest)
+        self.assertEqual(self.read_dest(), render_page(self.source, template))
+
+    def test_missing_title_leaves_no_output(self):
+        source = self.write("index.md", "no title\n\n## not h1")
+        with self.assertRaises(Exception):
+            stream_page(source, self.template, self.dest)
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_rejects_repeated_content_placeholder(self):
+        template = self.write("template.html", "{{ Content }}{{ Content }}")
+        with self.assertRaises(ValueError):
+            stream_page(self.source, template, self.dest)
+
+    def test_generate_page_streams_large_sources(self):
+        with redirect_stdout(io.StringIO()):
+            generate_page(self.source, self.template, self.dest, "/site/", stream_over=0)
+        self.assertEqual(self.read_dest(), render_page(self.source, self.template, "/site/"))
+
+    def test_collects_the_same_references_as_render_page(self):
+        rendered = {}
+        render_page(self.source, self.template, page_text=rendered, search=False, references=True)
+        streamed = {}
+        stream_page(self.source, self.template, self.dest, page_text=streamed, search=False, references=True)
+        self.assertEqual(rendered, {"title": "The *Title*", "refs": ["/a", "/i.png"]})
+        self.assertEqual(streamed, rendered)
+
+    def test_peak_memory_is_bounded_by_a_block(self):
+        paragraph = "Some **bold** and _italic_ text with a [link](/page).\n\n"
+        source = self.write("big.md", "# Big\n\n" + paragraph * 40000)
+        tracemalloc.start()
+        try:
+            stream_page(source, self.template, self.dest)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(os.path.getsize(self.dest), 2 * 1024 * 1024)
+        self.assertLess(peak, 256 * 1024)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -20,6 +20,8 @@ class BlockType(Enum):
 
 class TextNode():
 
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type  #Needs to be of type TextType
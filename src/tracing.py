@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Recorded Chrome trace events, or None while tracing is disabled.
+_events = None
+
+
+def enable_tracing():
+    global _events
+    if _events is None:
+        _events = []
+
+
+def disable_tracing():
+    global _events
+    _events = None
+
+
+def tracing_enabled():
+    return _events is not None
+
+
+@contextmanager
+def span(name, **args):
+    if _events is None:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        _events.append({
+            "name": name,
+            "ph": "X",
+            "ts": start / 1000,
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "args": args,
+        })
+
+
+def drain_events():
+    # Hands the events recorded so far to the caller, e.g. from a worker
+    # process back to the parent.
+    global _events
+    events = _events or []
+    if _events is not None:
+        _events = []
+    return events
+
+
+def add_events(events):
+    if _events is not None:
+        _events.extend(events)
+
+
+def write_trace(trace_path):
+    with open(trace_path, "w") as f:
+        json.dump({"traceEvents": _events or [], "displayTimeUnit": "ms"}, f)
+
+
+def slowest_pages(count=10):
+    # Returns [(page path, duration ms, {span name: ms})] for the slowest
+    # "page" spans, with the time of the spans nested inside each of them.
+    events = sorted(_events or [], key=lambda event: (event["pid"], event["tid"], event["ts"], -event["dur"]))
+    pages = []
+    current = None
+    for event in events:
+        if current is not None and (
+                (event["pid"], event["tid"]) != (current[0]["pid"], current[0]["tid"])
+                or event["ts"] >= current[0]["ts"] + current[0]["dur"]):
+            current = None
+        if event["name"] == "page":
+            current = (event, {})
+            pages.append(current)
+        elif current is not None:
+            current[1][event["name"]] = current[1].get(event["name"], 0) + event["dur"] / 1000
+
+    pages.sort(key=lambda page: page[0]["dur"], reverse=True)
+    return [(event["args"].get("path"), event["dur"] / 1000, stages) for event, stages in pages[:count]]
+
+
+def print_summary(count=10):
+    print(f"SLOWEST PAGES - top {count}")
+    for path, duration, stages in slowest_pages(count):
+        breakdown = ", ".join(f"{name} {ms:.2f}" for name, ms in stages.items())
+        print(f"{duration:10.2f} ms  {path}  ({breakdown})")
@@ -1,11 +1,17 @@
 import re
 import os
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 
 from parentnode import ParentNode
 from leafnode import LeafNode 
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, escape_text
 from textnode import TextType, TextNode, BlockType
+from template import load_template, rebase_urls
+from output import write_output, AtomicOutput
+from search import tokenize
+from minify import Minifier
+from tracing import span, tracing_enabled, enable_tracing, disable_tracing, add_events, drain_events
 
 
 def text_node_to_html_node(text_node):
@@ -60,12 +66,12 @@ def split_nodes_image(old_nodes):
     new_nodes = []
 
     for node in old_nodes:
-        images = extract_markdown_images(node.text)
-
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
 
+        images = extract_markdown_images(node.text)
+
         if not images:
             new_nodes.append(TextNode(node.text, TextType.TEXT))
             continue
@@ -93,12 +99,12 @@ def split_nodes_link(old_nodes):
     new_nodes = []
 
     for node in old_nodes:
-        links = extract_markdown_links(node.text)
-
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
 
+        links = extract_markdown_links(node.text)
+
         if not links:
             new_nodes.append(TextNode(node.text, TextType.TEXT))
             continue
@@ -121,18 +127,60 @@ def split_nodes_link(old_nodes):
     return new_nodes
 
 
+INLINE_MARKUP_RE = re.compile(r"[\[`_*]")
+LINK_OR_IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)|(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+INLINE_DELIMITERS = (("**", TextType.BOLD), ("_", TextType.ITALIC), ("`", TextType.CODE))
+
+
 def text_to_textnodes(text):
     if not text: return []
 
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    # "!" only matters in front of "[", so these are all the characters that
+    # can start inline markup.
+    if not INLINE_MARKUP_RE.search(text):
+        return [TextNode(text, TextType.TEXT)]
+
+    # Images and links are found first, then the text between them is split on
+    # "**", "_" and "`" in that order, exactly like the old chain of
+    # split_nodes_* passes but in one left-to-right scan.
+    nodes = []
+    position = 0
+    for match in LINK_OR_IMAGE_RE.finditer(text):
+        split_delimited(text, position, match.start(), 0, nodes)
+        if match.group(2) is not None:
+            nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        else:
+            nodes.append(TextNode(match.group(3), TextType.LINK, match.group(4)))
+        position = match.end()
+    split_delimited(text, position, len(text), 0, nodes)
     return nodes
 
 
+def split_delimited(text, start, end, level, nodes):
+    if level == len(INLINE_DELIMITERS):
+        if start < end:
+            nodes.append(TextNode(text[start:end], TextType.TEXT))
+        return
+
+    delimiter, text_type = INLINE_DELIMITERS[level]
+    inside = False
+    while True:
+        index = text.find(delimiter, start, end)
+        if index == -1:
+            break
+        if inside:
+            if index > start:
+                nodes.append(TextNode(text[start:index], text_type))
+        else:
+            split_delimited(text, start, index, level + 1, nodes)
+        inside = not inside
+        start = index + len(delimiter)
+
+    if inside:
+        raise ValueError("invalid markdown, formatted section not closed")
+    split_delimited(text, start, end, level + 1, nodes)
+
+
 def markdown_to_blocks(markdown):
     blocks = markdown.split('\n\n')
     blocks = map(lambda x: x.strip(), blocks)
@@ -140,86 +188,176 @@ def markdown_to_blocks(markdown):
     return list(blocks)
 
 def block_to_block_type(text_block):
-    if text_block[0] == "#":
-        sections = text_block.split(" ")
-        if len(sections[0]) <= 6 and all(map(lambda x: x == "#", sections[0])):
+    return block_lines_to_block_type(text_block.split("\n"))
+
+
+def scan_blocks(markdown):
+    return scan_block_lines(markdown.split("\n"))
+
+
+def scan_block_lines(lines):
+    # Yields (block_type, lines) for every block, reading each line once.
+    # Blocks are separated by empty lines and trimmed like markdown_to_blocks.
+    block = []
+    for line in lines:
+        if line:
+            block.append(line)
+            continue
+        if block:
+            typed_block = type_block_lines(block)
+            if typed_block:
+                yield typed_block
+            block = []
+    if block:
+        typed_block = type_block_lines(block)
+        if typed_block:
+            yield typed_block
+
+
+def type_block_lines(lines):
+    start = 0
+    end = len(lines)
+    while start < end and lines[start].isspace():
+        start += 1
+    while end > start and lines[end - 1].isspace():
+        end -= 1
+    if start == end:
+        return None
+
+    lines = lines[start:end]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return block_lines_to_block_type(lines), lines
+
+
+def block_lines_to_block_type(lines):
+    first = lines[0]
+    head = first[0]
+    if head == "#":
+        space = first.find(" ")
+        if space == -1:
+            marker = first if len(lines) == 1 else ""
+        else:
+            marker = first[:space]
+        if marker and len(marker) <= 6 and marker.count("#") == len(marker):
             return BlockType.HEADING
-    elif text_block[0] == "`":
-        sections = text_block.split("```")
+    elif head == "`":
+        sections = "\n".join(lines).split("```")
         if len(sections) == 3 and sections[0] == "" and sections[2] == "":
             return BlockType.CODE
-    elif text_block[0] == ">":
-        sections = text_block.split("\n")
-        if all(map(lambda x: x[0] == ">", sections)):
+    elif head == ">":
+        if all(line[0] == ">" for line in lines):
             return BlockType.QUOTE
-    elif text_block[0] == "-":
-        sections = text_block.split("\n")
-        if all(map(lambda x: x[0:2] == "- ", sections)):
+    elif head == "-":
+        if all(line[0:2] == "- " for line in lines):
             return BlockType.UNORDERED_LIST
-    elif text_block[0] in "123456789":
-        sections = text_block.split("\n")
-        for index, section in enumerate(sections):
-            x = section.split(".")
-            if len(x) == 2 and int(x[0]) == index + 1:
-                continue 
-            else:
+    elif head in "123456789":
+        for index, line in enumerate(lines):
+            if line.count(".") != 1:
+                return BlockType.PARAGRAPH
+            number = line[:line.index(".")]
+            if number != str(index + 1) and not is_int_equal(number, index + 1):
                 return BlockType.PARAGRAPH
         return BlockType.ORDERED_LIST
 
     return BlockType.PARAGRAPH
 
 
+def is_int_equal(text, value):
+    try:
+        return int(text) == value
+    except ValueError:
+        return False
+
+
+def heading_parts(lines):
+    first = lines[0]
+    marker, _, text = first.partition(" ")
+    if len(lines) > 1:
+        text = "\n".join([text] + lines[1:])
+    return len(marker), text
+
+
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    parent_node = ParentNode("div", [], )
+    return blocks_to_html_node(scan_blocks(markdown))
 
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        block_node = None
-
-        match(block_type):
-            case BlockType.PARAGRAPH:
-                clean_block = block.replace('\n', ' ')
-                children = text_to_children(clean_block)
-                block_node = ParentNode("p", children, )
-            case BlockType.HEADING:
-                sections = block.split(" ", 1)
-                hvalue = len(sections[0])
-                heading_text = sections[1]
-                children = text_to_children(heading_text)
-                block_node = ParentNode(f"h{hvalue}", children)
-            case BlockType.CODE:
-                clean_block = block.replace('```', '')
-                block_node = ParentNode("pre", [])
-                block_node.children.append(LeafNode("code", clean_block, []))
-            case BlockType.QUOTE:
-                clean_block = block.replace('\n', ' ').replace('> ', '')
-                children = text_to_children(clean_block)
-                block_node = ParentNode("blockquote", children, )
-            case BlockType.UNORDERED_LIST:
-                clean_block = block.replace('- ', '')
-                children = []
-                block_node = ParentNode("ul", children, )
-                for li_content in clean_block.split('\n'):
-                    children = text_to_children(li_content)
-                    block_node.children.append(ParentNode("li", children))
-            case BlockType.ORDERED_LIST:
-                children = []
-                block_node = ParentNode("ol", children, )
-                for li_content in block.split('\n'):
-                    children = text_to_children(li_content.split(" ", 1)[1])
-                    block_node.children.append(ParentNode("li", children))
 
+def blocks_to_html_node(blocks, terms=None, refs=None):
+    parent_node = ParentNode("div", [], )
+
+    for block_type, lines in blocks:
+        block_node = block_to_html_node(block_type, lines, terms, refs)
         if block_node:
             parent_node.children.append(block_node)
 
     return parent_node
 
 
-def text_to_children(text):
+def block_to_html_node(block_type, lines, terms=None, refs=None):
+    # terms, if given, is a set that collects the search terms of the text
+    # nodes produced by the inline parser; refs one that collects the URLs
+    # of its IMAGE and LINK nodes.
+    block_node = None
+
+    match(block_type):
+        case BlockType.PARAGRAPH:
+            children = text_to_children(" ".join(lines), terms, refs)
+            block_node = ParentNode("p", children, )
+        case BlockType.HEADING:
+            hvalue, heading_text = heading_parts(lines)
+            children = text_to_children(heading_text, terms, refs)
+            block_node = ParentNode(f"h{hvalue}", children)
+        case BlockType.CODE:
+            clean_block = "\n".join(lines).replace('```', '')
+            block_node = ParentNode("pre", [LeafNode("code", clean_block)])
+        case BlockType.QUOTE:
+            clean_block = " ".join(lines).replace('> ', '')
+            children = text_to_children(clean_block, terms, refs)
+            block_node = ParentNode("blockquote", children, )
+        case BlockType.UNORDERED_LIST:
+            children = []
+            block_node = ParentNode("ul", children, )
+            for li_content in lines:
+                children = text_to_children(li_content.replace('- ', ''), terms, refs)
+                block_node.children.append(ParentNode("li", children))
+        case BlockType.ORDERED_LIST:
+            children = []
+            block_node = ParentNode("ol", children, )
+            for li_content in lines:
+                children = text_to_children(li_content.partition(" ")[2], terms, refs)
+                block_node.children.append(ParentNode("li", children))
+
+    return block_node
+
+
+def blocks_to_html(blocks, block_cache=None):
+    # Same HTML as blocks_to_html_node(blocks).to_html(), but each block is
+    # serialized on its own so unchanged blocks can come from block_cache.
+    parts = ["<div>"]
+    for block_type, lines in blocks:
+        if block_cache is None:
+            html = render_block(block_type, lines)
+        else:
+            html = block_cache.render(block_type, lines, render_block)
+        parts.append(html)
+    if len(parts) == 1:
+        raise ValueError("no children provided")
+    parts.append("</div>")
+    return "".join(parts)
+
+
+def render_block(block_type, lines, terms=None, refs=None):
+    return block_to_html_node(block_type, lines, terms, refs).to_html()
+
+
+def text_to_children(text, terms=None, refs=None):
     text_nodes = text_to_textnodes(text)
     html_nodes = []
     for text_node in text_nodes:
+        if terms is not None:
+            terms.update(tokenize(text_node.text))
+        if refs is not None and text_node.text_type in (TextType.IMAGE, TextType.LINK):
+            refs.add(text_node.url)
         html_node = text_node_to_html_node(text_node)
         html_nodes.append(html_node)
     return html_nodes
@@ -234,19 +372,37 @@ def clear_public_directory(dir_to_remove="./public"):
         print(f"NOOP - {dir_to_remove} did not exist")
 
 
+def remove_output(path, dest_dir):
+    # Also removes the path's .gz sidecar, if the build wrote one.
+    root = os.path.abspath(dest_dir)
+    if not os.path.abspath(path).startswith(root + os.sep):
+        raise ValueError(f"{path} is outside {dest_dir}")
+    for output_path in (path, path + ".gz"):
+        if os.path.exists(output_path):
+            print(f"REMOVING - {output_path}")
+            os.remove(output_path)
+    # Prune directories left empty by the removal, but never dest_dir itself.
+    directory = os.path.dirname(path)
+    while os.path.abspath(directory).startswith(root + os.sep):
+        if not os.path.isdir(directory) or os.listdir(directory):
+            break
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+
 def build_public_directory(dir_to_build_from="./static", dir_to_build_to="./public"):
     print("STARTED - build_public_directory")
     if not os.path.exists(dir_to_build_to):
         print(f"CREATING - {dir_to_build_to}")
         os.mkdir(dir_to_build_to)
 
-    dirs = os.listdir(dir_to_build_from)
+    dirs = sorted(os.listdir(dir_to_build_from))
     for dir in dirs:
         path_from = os.path.join(dir_to_build_from, dir)
         path_to = os.path.join(dir_to_build_to, dir)
         if os.path.isdir(path_from):
             print(f"CREATING - {path_to}")
-            os.mkdir(path_to)
+            os.makedirs(path_to, exist_ok=True)
             build_public_directory(path_from, path_to)
         else:
             print(f"COPY - {path_from} TO {path_to}")
@@ -254,52 +410,262 @@ def build_public_directory(dir_to_build_from="./static", dir_to_build_to="./publ
 
 
 def extract_title(markdown):
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        if block_to_block_type(block) == BlockType.HEADING:
-            sections = block.split(" ", 1)
-            if len(sections[0]) == 1:
-                return sections[1]
+    return title_from_blocks(scan_blocks(markdown))
+
+
+def title_from_blocks(blocks):
+    for block_type, lines in blocks:
+        if block_type == BlockType.HEADING:
+            hvalue, heading_text = heading_parts(lines)
+            if hvalue == 1:
+                return heading_text
     raise Exception("no title to extract")
 
 
-def generate_page(from_path, template_path, dest_path, basepath='/'):
+def generate_page(from_path, template_path, dest_path, basepath='/', cache=None, stream_over=None,
+                  fsync=False, search=False, assets=None, minify=False, references=False, store=None):
+    # With search, returns {"title", "terms"} of the page for the search index,
+    # with references {"refs"}, the URLs its images and links point at.
+    # assets maps static asset paths to their fingerprinted names; store is
+    # a BlobStore to link the output into.
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    page_text = {} if search or references else None
+
+    with span("page", path=from_path):
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if stream_over is not None and os.path.getsize(from_path) >= stream_over:
+            with span("stream"):
+                changed = stream_page(from_path, template_path, dest_path, basepath, fsync, page_text, assets,
+                                      minify, search, references, store)
+        else:
+            page = render_page(from_path, template_path, basepath, cache, page_text=page_text, assets=assets,
+                               minify=minify, search=search, references=references)
+            with span("write"):
+                changed = write_output(dest_path, page, fsync, store)
+
+    if not changed:
+        print(f"UNCHANGED - {dest_path}")
+    return page_text
+
+
+def stream_page(from_path, template_path, dest_path, basepath='/', fsync=False, page_text=None, assets=None,
+                minify=False, search=True, references=False, store=None):
+    # Same output as render_page, but the source is read line by line and
+    # each block is written out as soon as it is rendered. Only the current
+    # block is held in memory, plus the blocks before the first h1 while a
+    # {{ Title }} placeholder is still waiting for it. Returns whether
+    # dest_path changed.
+    template = load_template(template_path)
+    if [text for is_placeholder, text in template.segments if is_placeholder].count("Content") > 1:
+        raise ValueError("streaming needs at most one {{ Content }} placeholder")
+
+    terms = set() if page_text is not None and search else None
+    refs = set() if page_text is not None and references else None
+    output = AtomicOutput(dest_path, "w", fsync, store=store)
+    with open(from_path, "r") as from_file, output as dest_file:
+        blocks = scan_block_lines(line.rstrip("\n") for line in from_file)
+        if minify:
+            minifier = Minifier(dest_file.write)
+            title = write_page_stream(template, blocks, minifier.write, basepath, terms, assets, refs)
+            minifier.close()
+        else:
+            title = write_page_stream(template, blocks, dest_file.write, basepath, terms, assets, refs)
+    update_page_text(page_text, title, terms, refs)
+    return output.changed
 
-    from_file = open(from_path, "r")
-    md = from_file.read()
-    from_file.close()
 
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
+def write_page_stream(template, blocks, write, basepath='/', terms=None, assets=None, refs=None):
+    # Returns the title.
+    if basepath == '/' and not assets:
+        write_value = write
+    else:
+        write_value = lambda fragment: write(rebase_urls(fragment, basepath, assets))
+
+    title = None
+    pending = []
+
+    def render_next():
+        # Renders the next block and notes the title; None once exhausted.
+        nonlocal title
+        block = next(blocks, None)
+        if block is None:
+            return None
+        block_type, lines = block
+        if title is None and block_type == BlockType.HEADING:
+            hvalue, heading_text = heading_parts(lines)
+            if hvalue == 1:
+                title = heading_text
+        return render_block(block_type, lines, terms, refs)
+
+    for is_placeholder, text in template.rebased_segments(basepath, assets):
+        if not is_placeholder:
+            write(text)
+        elif text == "Title":
+            while title is None:
+                html = render_next()
+                if html is None:
+                    raise Exception("no title to extract")
+                pending.append(html)
+            write_value(escape_text(title))
+        elif text == "Content":
+            write_value("<div>")
+            for html in pending:
+                write_value(html)
+            pending = []
+            while (html := render_next()) is not None:
+                write_value(html)
+            write_value("</div>")
+        else:
+            write_value("{{ " + text + " }}")
 
-    html_node = markdown_to_html_node(md)
+    while title is None:
+        if render_next() is None:
+            raise Exception("no title to extract")
+    return title
 
-    title = extract_title(md)
-    html_string = html_node.to_html()
 
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html_string)
-    template = template.replace('href="/', f'href="{basepath}')
-    template = template.replace('src="/', f'src="{basepath}')
+def render_page(from_path, template_path, basepath='/', cache=None, block_cache=None, page_text=None,
+                assets=None, minify=False, search=True, references=False):
+    # page_text, if given, is a dict that receives the page's title and,
+    # as asked, its search terms and references.
+    with span("read"):
+        from_file = open(from_path, "r")
+        md = from_file.read()
+        from_file.close()
 
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    dest_file = open(dest_path, "a")
-    dest_file.write(template)
-    dest_file.close()
+    template = load_template(template_path)
 
+    terms = set() if page_text is not None and search else None
+    refs = set() if page_text is not None and references else None
+    if cache is None:
+        title, content = render_markdown(md, block_cache, terms, refs)
+    else:
+        # The cached content is independent of the template and basepath, so
+        # changing either only costs one template application per page.
+        key = cache.key(md)
+        entry = cache.get(key)
+        if entry is None or (terms is not None and "terms" not in entry) or (refs is not None and "refs" not in entry):
+            title, content = render_markdown(md, block_cache, terms, refs)
+            if not isinstance(content, str):
+                with span("serialize"):
+                    content = content.to_html()
+            entry = {"title": title, "content": content}
+            if terms is not None:
+                entry["terms"] = sorted(terms)
+            if refs is not None:
+                entry["refs"] = sorted(refs)
+            cache.put(key, entry)
+        else:
+            title, content = entry["title"], entry["content"]
+            if terms is not None:
+                terms.update(entry["terms"])
+            if refs is not None:
+                refs.update(entry["refs"])
+
+    update_page_text(page_text, title, terms, refs)
+
+    with span("template"):
+        values = {"Title": escape_text(title), "Content": content}
+        if not minify:
+            return template.render(values, basepath, assets)
+        # Minified from the serializer's fragments, not from the finished page.
+        fragments = []
+        minifier = Minifier(fragments.append)
+        template.write(minifier.write, values, basepath, assets)
+        minifier.close()
+        return "".join(fragments)
+
+
+def render_markdown(md, block_cache=None, terms=None, refs=None):
+    # Returns the title and the content as an HTML node, or as an HTML string
+    # when it was assembled from block_cache. Cached blocks aren't parsed, so
+    # collecting terms or refs bypasses block_cache.
+    with span("parse_blocks"):
+        blocks = list(scan_blocks(md))
+
+    with span("parse_inline"):
+        if block_cache is None or terms is not None or refs is not None:
+            content = blocks_to_html_node(blocks, terms, refs)
+        else:
+            content = blocks_to_html(blocks, block_cache)
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath='/'):
+    return title_from_blocks(blocks), content
+
+
+def update_page_text(page_text, title, terms, refs):
+    if page_text is None:
+        return
+    page_text["title"] = title
+    if terms is not None:
+        page_text["terms"] = sorted(terms)
+    if refs is not None:
+        page_text["refs"] = sorted(refs)
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath='/', jobs=1, **page_options):
     print("STARTED - generate_pages_recursive")
-    dirs = os.listdir(dir_path_content)
-    for dir in dirs:
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    return generate_pages(pages, template_path, basepath, jobs, **page_options)
+
+
+def generate_pages(pages, template_path, basepath='/', jobs=1, **page_options):
+    # page_options are passed through to generate_page (cache, stream_over,
+    # fsync, search, references...). Returns {source path: page text} when
+    # searching or collecting references.
+    # Create every output directory up front so workers never race on mkdir.
+    for dest_dir in sorted({os.path.dirname(dest_path) for _, dest_path in pages}):
+        if dest_dir and not os.path.isdir(dest_dir):
+            print(f"CREATING - {dest_dir}")
+            os.makedirs(dest_dir, exist_ok=True)
+
+    texts = {}
+    if jobs <= 1 or len(pages) <= 1:
+        for from_path, dest_path in pages:
+            page_text = generate_page(from_path, template_path, dest_path, basepath, **page_options)
+            if page_text is not None:
+                texts[from_path] = page_text
+        return texts
+
+    # Largest sources first so a big page doesn't end up alone at the tail.
+    pages = sorted(pages, key=lambda page: os.path.getsize(page[0]), reverse=True)
+    from_paths = [from_path for from_path, _ in pages]
+    dest_paths = [dest_path for _, dest_path in pages]
+    count = len(pages)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(generate_page_task, from_paths, [template_path] * count,
+                               dest_paths, [basepath] * count, [page_options] * count,
+                               [tracing_enabled()] * count)
+        for from_path, (page_text, events) in zip(from_paths, results):
+            if page_text is not None:
+                texts[from_path] = page_text
+            add_events(events)
+    return texts
+
+
+def generate_page_task(from_path, template_path, dest_path, basepath, page_options, trace):
+    # Runs in a worker process; trace events travel back with the result.
+    # A forked worker starts with a copy of the parent's events, which must
+    # not be sent back a second time.
+    disable_tracing()
+    if trace:
+        enable_tracing()
+    page_text = generate_page(from_path, template_path, dest_path, basepath, **page_options)
+    return page_text, drain_events()
+
+
+def collect_pages(dir_path_content, dest_dir_path):
+    with span("walk", path=dir_path_content):
+        return walk_pages(dir_path_content, dest_dir_path)
+
+
+def walk_pages(dir_path_content, dest_dir_path):
+    pages = []
+    # Sorted, so every machine lists (and shards) pages in the same order.
+    for dir in sorted(os.listdir(dir_path_content)):
         path_from = os.path.join(dir_path_content, dir)
         path_to = os.path.join(dest_dir_path, dir)
         if os.path.isdir(path_from):
-            print(f"CREATING - {path_to}")
-            os.mkdir(path_to)
-            generate_pages_recursive(path_from, template_path, path_to, basepath)
+            pages.extend(walk_pages(path_from, path_to))
         else:
-            renamed_path_to = path_to.replace('.md', '.html')
-            generate_page(path_from, template_path, renamed_path_to, basepath)
+            pages.append((path_from, path_to.replace('.md', '.html')))
+    return pages